@@ -0,0 +1,174 @@
+import json
+import mmap
+import os
+import struct
+import sys
+
+from PIL import Image
+
+# Memory-mapped store of decoded, preprocessed pixel buffers.
+#
+# Decoding the 4K renders and building their mip pyramids is the bulk of startup, and
+# every simulator process on a host used to hold private copies of the result. The
+# store keeps those pixels as raw buffers in one file. Each process maps it read-only
+# and wraps the buffers with Image.frombuffer, so the pixels live once in the page cache
+# and are shared by all processes.
+#
+# Layout:  MAGIC | uint64 header length | JSON header | page-aligned raw pixel buffers
+#
+# Build (or rebuild after changing the source images):
+#   python asset_store.py [output path]
+
+MAGIC = b"STMRAW1\n"
+ALIGN = mmap.PAGESIZE
+ZERO_COPY_MODES = ("L", "RGBA", "RGBX", "I", "F") # Modes frombuffer maps without copying
+
+ASSET_STORE_FILE = "assets.raw"
+
+
+def source_stamp(path):
+    """Size + mtime of a source file, used to detect a stale store"""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_asset_store(path, entries, sources, meta=None):
+    """
+    Write {name: [image, ...]} to 'path'. 'sources' maps source files to their
+    source_stamp; 'meta' is stored as-is in the header (JSON-serialisable).
+    The file is replaced atomically, so running processes keep their existing mapping.
+    """
+    header = {"sources": sources, "entries": {}, "meta": meta or {}}
+    offset = 0
+    for name, images in entries.items():
+        records = []
+        for img in images:
+            if img.mode not in ZERO_COPY_MODES:
+                raise ValueError(f"{name}: mode {img.mode} cannot be mapped zero-copy")
+            length = len(img.tobytes())
+            records.append({"mode": img.mode, "size": list(img.size), "offset": offset, "length": length})
+            offset = _align(offset + length)
+        header["entries"][name] = records
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, images in entries.items():
+            for img, rec in zip(images, header["entries"][name]):
+                f.seek(data_start + rec["offset"])
+                f.write(img.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+class AssetStore:
+    """Read-only mapping of an asset store file. Images reference the mapping directly."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(MAGIC)] != MAGIC:
+            raise ValueError("not an asset store file")
+        (header_len,) = struct.unpack_from("<Q", self.mm, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self.mm[start:start + header_len].decode("utf-8"))
+        self.data_start = _align(start + header_len)
+        self.meta = self.header.get("meta", {})
+        self.nbytes = len(self.mm)
+
+    def is_current(self, sources):
+        """True if every listed source file that exists still matches its recorded stamp"""
+        recorded = self.header["sources"]
+        for key, path in sources.items():
+            if not os.path.exists(path):
+                continue # e.g. frozen build shipping only the store
+            if recorded.get(key) != source_stamp(path):
+                return False
+        return True
+
+    def release_pages(self):
+        """Drop the mapping's pages from this process (they stay in the page cache)"""
+        if hasattr(mmap, "MADV_DONTNEED"):
+            self.mm.madvise(mmap.MADV_DONTNEED)
+
+    def __contains__(self, name):
+        return name in self.header["entries"]
+
+    def get(self, name):
+        """List of images (a mip pyramid, largest first) backed by the mapping"""
+        view = memoryview(self.mm)
+        images = []
+        for rec in self.header["entries"][name]:
+            start = self.data_start + rec["offset"]
+            buf = view[start:start + rec["length"]]
+            images.append(Image.frombuffer(rec["mode"], tuple(rec["size"]), buf, "raw", rec["mode"], 0, 1))
+        return images
+
+
+def open_asset_store(path, sources):
+    """Open the store at 'path' if it exists and matches 'sources', else None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        store = AssetStore(path)
+    except Exception as e:
+        print(f"Warning: Ignoring asset store {path}: {e}")
+        return None
+    if not store.is_current(sources):
+        print(f"Warning: Asset store {path} is stale - rebuild it with asset_store.py")
+        return None
+    return store
+
+
+def main():
+    # Imported here: integrated_gui itself imports this module
+    from integrated_gui import resource_path, asset_sources, load_line_drawing, RENDER_FILES, build_mip_pyramid
+    from render_delta import encode_render_deltas, patch_levels
+
+    out_path = sys.argv[1] if len(sys.argv) > 1 else resource_path(ASSET_STORE_FILE)
+    sources = asset_sources(resource_path("steamer.png"))
+
+    entries = {"line": build_mip_pyramid(load_line_drawing(sources["line"]))}
+    meta = {}
+    renders = {}
+    for key in RENDER_FILES:
+        path = sources.get("render/" + key)
+        if path and os.path.exists(path):
+            renders[key] = Image.open(path).convert("RGBA")
+        else:
+            print(f"Warning: Render file not found: {path}")
+
+    if len(renders) == len(RENDER_FILES) and len({img.size for img in renders.values()}) == 1:
+        # Store one base render + per-state patches instead of five full pyramids
+        base_key, deltas = encode_render_deltas(renders)
+        base = build_mip_pyramid(renders[base_key])
+        entries["render_base"] = base
+        for key, patches in deltas.items():
+            for i, (box, inner) in enumerate(patches):
+                entries[f"render_patch/{key}/{i}"] = patch_levels(renders[key].crop(box), len(base))
+        meta["render_deltas"] = {"base": base_key, "states": deltas}
+        patch_px = sum((b[2] - b[0]) * (b[3] - b[1]) for patches in deltas.values() for b, _ in patches)
+        full_px = base[0].width * base[0].height
+        print(f"Renders: base '{base_key}' + {sum(map(len, deltas.values()))} patches "
+              f"({patch_px / full_px:.2f} frames of patch pixels instead of {len(renders) - 1})")
+    else:
+        for key, img in renders.items():
+            entries["render/" + key] = build_mip_pyramid(img)
+
+    stamps = {k: source_stamp(p) for k, p in sources.items() if os.path.exists(p)}
+    write_asset_store(out_path, entries, stamps, meta)
+    print(f"Wrote {out_path} ({os.path.getsize(out_path) / 1048576:.1f} MB, {len(entries)} assets)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import os
+
+# Attract (demo) mode for unattended kiosks. Opt-in: off unless STEAMER_ATTRACT_IDLE is set.
+#
+# After STEAMER_ATTRACT_IDLE seconds without a click or key press (180 suits a showroom)
+# the simulator demonstrates itself through its normal state methods: power-on
+# heat-up, boost heat-up, steam, view switch, steam again, boost off, power off, and
+# back to the first view.
+#
+# Before the first step every frame the loop can show is composited once into the GUI's
+# frame cache (see SteamerGUI.compose_frame). Transitions are then cached frame swaps.
+# Steam uses the static sprite during the demo, so it needs no per-frame compositing.
+# Warming runs one frame per idle callback, so a click during warm-up is never delayed;
+# the GUI's own state is restored after each frame, and a rescale mid-warm starts over.
+#
+# The first click or key press stops the demo and returns the simulator to power-off
+# in the view the user last chose. A canvas click that ends the demo is consumed.
+
+# (delay after the previous step in ms, SteamerGUI method)
+DEMO_SEQUENCE = [
+    (1000, "toggle_power"), # Power on -> 8 s heat-up
+    (9500, "toggle_boost"), # Boost -> 8 s heat-up
+    (9500, "start_hold"),
+    (3500, "stop_hold"),
+    (1500, "toggle_view_mode"),
+    (2500, "start_hold"),
+    (3500, "stop_hold"),
+    (1500, "toggle_boost"), # Back to normal
+    (2500, "toggle_power"), # Off
+    (3000, "toggle_view_mode"),
+]
+
+PULSE_STEPS = 10 # Heating pulse levels pre-composited (0.2 .. 1.0)
+
+
+def demo_states():
+    """(power, mode, target, heating, hold, pulse) for every frame the demo can show"""
+    states = [(False, 1, 1, False, False, 0.0)]
+    for target in (1, 2):
+        for i in range(PULSE_STEPS):
+            states.append((True, 1, target, True, False, 0.2 + 0.8 * i / (PULSE_STEPS - 1)))
+    for mode in (1, 2):
+        for hold in (False, True):
+            states.append((True, mode, mode, False, hold, 1.0))
+    return states
+
+
+def idle_seconds_from_env():
+    """Seconds of inactivity before the demo starts; 0 (unset or invalid) = off"""
+    try:
+        return float(os.environ.get("STEAMER_ATTRACT_IDLE", 0))
+    except ValueError:
+        return 0.0
+
+
+class AttractMode:
+    def __init__(self, gui, idle_seconds):
+        self.gui = gui
+        self.idle_ms = int(idle_seconds * 1000)
+        self.active = False # Warming or playing
+        self.timer = None
+        self.step_index = 0
+        self.warm = None
+        self.user_view = gui.use_renders
+
+        gui.root.bind_all("<ButtonPress>", self.note_input, add="+")
+        gui.root.bind_all("<KeyPress>", self.note_input, add="+")
+        self.arm()
+
+    def _schedule(self, delay_ms, callback):
+        if self.timer:
+            self.gui.root.after_cancel(self.timer)
+        self.timer = self.gui.root.after(delay_ms, callback)
+
+    def arm(self):
+        """(Re)start the inactivity countdown"""
+        self._schedule(self.idle_ms, self.start)
+
+    def note_input(self, event=None):
+        self.interrupt()
+        self.arm()
+
+    def interrupt(self):
+        """Stop the demo if it is running. Returns True if it was."""
+        if not self.active:
+            return False
+        self.stop()
+        return True
+
+    def suspend(self):
+        """Stop the demo and the countdown until the next arm()"""
+        self.interrupt()
+        if self.timer:
+            self.gui.root.after_cancel(self.timer)
+            self.timer = None
+
+    # -----------------
+    # Demo loop
+    # -----------------
+    def start(self):
+        gui = self.gui
+        self.active = True
+        self.user_view = gui.use_renders
+        gui.latency.paused = True # Demo transitions are not user latency
+        gui.static_steam = True
+        self.reset_simulator()
+        self.step_index = 0
+        self.warm = self.warm_frames()
+        self._schedule(1, self.warm_step)
+
+    def warm_step(self):
+        if next(self.warm, None) is None:
+            self._schedule(DEMO_SEQUENCE[0][0], self.play_step)
+        else:
+            self._schedule(1, self.warm_step)
+
+    def play_step(self):
+        gui = self.gui
+        if self.step_index == 0 and not gui.frame_cache:
+            # Scale changed since the last warm-up (the cache is dropped on rescale)
+            self.warm = self.warm_frames()
+            self._schedule(1, self.warm_step)
+            return
+        _, method = DEMO_SEQUENCE[self.step_index]
+        getattr(gui, method)()
+        self.step_index = (self.step_index + 1) % len(DEMO_SEQUENCE)
+        self._schedule(DEMO_SEQUENCE[self.step_index][0], self.play_step)
+
+    def warm_frames(self):
+        """Generator: composite one demo frame per call, then hand the set to gui.frame_cache"""
+        gui = self.gui
+        frames = [(use_renders,) + state
+                  for use_renders in (gui.use_renders, not gui.use_renders) for state in demo_states()]
+        gui.frame_cache = None # Anything drawn meanwhile is composited for real
+        cache = {}
+        scale = gui.current_scale
+        i = 0
+        while True:
+            if gui.current_scale != scale:
+                # Rescaled mid-warm: the frames so far are at the old scale
+                cache.clear()
+                scale = gui.current_scale
+                i = 0
+            if i == len(frames):
+                break
+            key, frame = self.composite(frames[i])
+            cache[key] = frame
+            i += 1
+            yield key
+        gui.frame_cache = cache
+
+    def composite(self, state):
+        """(frame_key, frame) of 'state' = (use_renders, power, mode, target, heating, hold, pulse).
+        The GUI is back in its own state before this returns, so a redraw between idle
+        callbacks never shows a demo frame."""
+        gui = self.gui
+        saved = (gui.use_renders, gui.power_on, gui.mode, gui.target_mode, gui.is_heating,
+                 gui.hold_active, gui.pulse_intensity)
+        shown = (gui.current_processed_image, gui.current_frame_source, gui.current_dirty_rects)
+        try:
+            self.apply(state)
+            gui.compose_frame()
+            return gui.frame_key(), (gui.current_processed_image, gui.current_frame_source,
+                                     list(gui.current_dirty_rects))
+        finally:
+            self.apply(saved)
+            gui.current_processed_image, gui.current_frame_source, gui.current_dirty_rects = shown
+
+    def apply(self, state):
+        gui = self.gui
+        if state[0] != gui.use_renders:
+            gui.apply_view_mode(state[0])
+        (_, gui.power_on, gui.mode, gui.target_mode, gui.is_heating,
+         gui.hold_active, gui.pulse_intensity) = state
+
+    def reset_simulator(self):
+        gui = self.gui
+        gui.hold_active = False
+        if gui.power_on:
+            gui.toggle_power() # Off: cancels heating, resets mode and steam
+
+    def stop(self):
+        gui = self.gui
+        self.active = False
+        if self.timer:
+            gui.root.after_cancel(self.timer)
+            self.timer = None
+        self.warm = None
+        self.reset_simulator()
+        if gui.use_renders != self.user_view:
+            gui.toggle_view_mode()
+        gui.static_steam = False
+        gui.frame_cache = None # Release the demo frames
+        gui.latency.paused = False
+        gui.refresh_ui()
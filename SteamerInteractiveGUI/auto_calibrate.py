@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from integrated_gui import (LINE_POINTS, LINE_REFERENCE_SIZE, RENDER_POINTS, RENDER_REFERENCE_SIZE,
+                            CALIBRATION_FILE, RENDER_FILES, build_mip_pyramid, load_calibration)
+
+# Automatic button calibration.
+#
+# Templates are cut from a REFERENCE image set (the bundled assets and their current
+# calibration by default) around every known button centre, then located in a TARGET
+# image set by FFT-based normalised cross-correlation. The search runs on the coarsest
+# pyramid level first and is refined level by level inside a small window, so a full
+# 4K image set calibrates in seconds.
+#
+# Usage:
+#   python auto_calibrate.py --images path/to/new_set      (expects steamer.png + Renders/*.jpg)
+#
+# The result is written to <images>/calibration.json, which integrated_gui.py loads
+# when it sits next to the application.
+
+TEMPLATE_HALF = 80 # Half size of the template box, in reference pixels
+MIN_TEMPLATE = 24 # Smallest template side worth correlating at a coarse level
+COARSE_CANDIDATES = 5 # Coarse peaks carried down to full resolution
+REFINE_MARGIN = 6 # Search slack (pixels) around the upsampled estimate at each level
+
+
+def load_gray(path):
+    """Load an image as grayscale. Transparent areas are flattened onto white."""
+    img = Image.open(path)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(bg, img)
+    return img.convert("L")
+
+
+def _fast_len(n):
+    """Smallest 2^a * 3^b * 5^c >= n (fast FFT size)"""
+    best = 1 << int(np.ceil(np.log2(n)))
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p = p35
+            while p < n:
+                p *= 2
+            best = min(best, p)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def ncc_map(image, template):
+    """Normalised cross-correlation of 'template' over every valid position in 'image'"""
+    H, W = image.shape
+    h, w = template.shape
+    n = h * w
+
+    t = template - template.mean()
+    t_norm = np.sqrt((t * t).sum())
+    if t_norm < 1e-6:
+        return np.zeros((H - h + 1, W - w + 1), dtype=np.float32)
+
+    # Numerator: correlation = convolution with the flipped template, via FFT
+    shape = (_fast_len(H + h - 1), _fast_len(W + w - 1))
+    spec = np.fft.rfft2(image, shape) * np.fft.rfft2(t[::-1, ::-1], shape)
+    num = np.fft.irfft2(spec, shape)[h - 1:H, w - 1:W]
+
+    # Denominator: windowed image energy from integral images
+    def window_sum(a):
+        c = np.pad(a, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+        return c[h:, w:] - c[:-h, w:] - c[h:, :-w] + c[:-h, :-w]
+
+    img64 = image.astype(np.float64)
+    s1 = window_sum(img64)
+    s2 = window_sum(img64 * img64)
+    var = np.maximum(s2 - s1 * s1 / n, 0.0)
+    denom = np.sqrt(var) * t_norm
+
+    out = np.zeros_like(num)
+    valid = denom > 1e-6 * n
+    out[valid] = num[valid] / denom[valid]
+    return out
+
+
+def _peak(score):
+    iy, ix = np.unravel_index(np.argmax(score), score.shape)
+    return ix, iy, float(score[iy, ix])
+
+
+def _peaks(score, count, radius):
+    """Up to 'count' best peaks, suppressing neighbours within 'radius'"""
+    score = score.copy()
+    peaks = []
+    for _ in range(count):
+        x, y, s = _peak(score)
+        if s <= 0:
+            break
+        peaks.append((x, y, s))
+        score[max(0, y - radius):y + radius + 1, max(0, x - radius):x + radius + 1] = -1
+    return peaks
+
+
+def refine(image_levels, template_levels, top, x, y, score):
+    """Follow one coarse estimate down to level 0"""
+    for level in range(top - 1, -1, -1):
+        img = image_levels[level]
+        tpl = template_levels[level]
+        h, w = tpl.shape
+        # Upsample estimate and search a small window around it
+        cx, cy = x * 2, y * 2
+        x0 = max(0, cx - REFINE_MARGIN)
+        y0 = max(0, cy - REFINE_MARGIN)
+        x1 = min(img.shape[1], cx + REFINE_MARGIN + w)
+        y1 = min(img.shape[0], cy + REFINE_MARGIN + h)
+        if x1 - x0 < w or y1 - y0 < h:
+            x, y = cx, cy # Keep the estimate at this level's resolution
+            continue
+        dx, dy, score = _peak(ncc_map(img[y0:y1, x0:x1], tpl))
+        x, y = x0 + dx, y0 + dy
+
+    return x, y, score
+
+
+def locate(image_levels, template_levels):
+    """
+    Coarse-to-fine search. Returns (top-left x, top-left y, score) at full resolution,
+    or (0, 0, 0.0) if nothing correlates at all (blank or featureless image).
+    """
+    # Coarsest level where the template is still meaningful
+    top = 0
+    while (top + 1 < min(len(image_levels), len(template_levels))
+           and min(template_levels[top + 1].shape) >= MIN_TEMPLATE):
+        top += 1
+
+    # Repeated structures (front/side views) look alike when coarse - keep several candidates
+    coarse = ncc_map(image_levels[top], template_levels[top])
+    radius = max(template_levels[top].shape) // 2
+    results = [refine(image_levels, template_levels, top, x, y, s)
+               for x, y, s in _peaks(coarse, COARSE_CANDIDATES, radius)]
+    return max(results, key=lambda r: r[2], default=(0, 0, 0.0))
+
+
+def as_levels(img, count):
+    """Mip pyramid as float32 arrays (at most 'count' levels)"""
+    return [np.asarray(level, dtype=np.float32) for level in build_mip_pyramid(img, min_dim=MIN_TEMPLATE)[:count]]
+
+
+def cut_templates(ref_img, points, scale):
+    """Crop template boxes around each point. 'scale' maps reference -> target pixels."""
+    half = TEMPLATE_HALF
+    templates = {}
+    for name, (px, py) in points.items():
+        box = (int(px - half), int(py - half), int(px + half), int(py + half))
+        if box[0] < 0 or box[1] < 0 or box[2] > ref_img.width or box[3] > ref_img.height:
+            print(f"  Skipping {name}: template box outside reference image")
+            continue
+        tpl = ref_img.crop(box)
+        if abs(scale - 1.0) > 1e-3:
+            tpl = tpl.resize((max(1, round(tpl.width * scale)), max(1, round(tpl.height * scale))), Image.Resampling.LANCZOS)
+        templates[name] = tpl
+    return templates
+
+
+def calibrate_image(target_img, templates):
+    """Locate every template in one image -> {name: ((cx, cy), score)}"""
+    image_levels = as_levels(target_img, 16)
+    found = {}
+    for name, tpl in templates.items():
+        tpl_levels = as_levels(tpl, len(image_levels))
+        x, y, score = locate(image_levels, tpl_levels)
+        found[name] = ((x + tpl.width / 2.0, y + tpl.height / 2.0), score)
+    return found
+
+
+def main():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Locate steamer buttons in a new image set by template matching")
+    parser.add_argument("--images", required=True, help="Directory with steamer.png and Renders/*.jpg to calibrate")
+    parser.add_argument("--reference", default=base_dir, help="Reference image set (default: bundled assets)")
+    parser.add_argument("--out", default=None, help="Output file (default: <images>/calibration.json)")
+    parser.add_argument("--min-score", type=float, default=0.5, help="Warn below this correlation score")
+    args = parser.parse_args()
+
+    t_start = time.perf_counter()
+
+    # Reference calibration: the reference set's own file if it has one, else built-in defaults
+    line_ref = (LINE_REFERENCE_SIZE, LINE_POINTS)
+    render_ref = (RENDER_REFERENCE_SIZE, RENDER_POINTS)
+    ref_cal = load_calibration(os.path.join(args.reference, CALIBRATION_FILE))
+    if ref_cal:
+        line_ref = ref_cal.get("line", line_ref)
+        render_ref = ref_cal.get("render", render_ref)
+
+    result = {}
+    ok = True
+
+    # 1. Line drawing
+    ref_img = load_gray(os.path.join(args.reference, "steamer.png"))
+    target_img = load_gray(os.path.join(args.images, "steamer.png"))
+    ref_size, ref_points = line_ref
+    # Reference points are stored in reference-size pixels; map them onto the actual reference image
+    sx = ref_img.width / ref_size[0]
+    points = {k: (x * sx, y * ref_img.height / ref_size[1]) for k, (x, y) in ref_points.items()}
+    templates = cut_templates(ref_img, points, target_img.width / ref_img.width)
+
+    print(f"Line drawing: {target_img.size}")
+    found = calibrate_image(target_img, templates)
+    for name, ((cx, cy), score) in found.items():
+        flag = "" if score >= args.min_score else "  <-- LOW SCORE"
+        ok = ok and score >= args.min_score
+        print(f"  {name:<12} ({cx:7.1f}, {cy:7.1f})  score={score:.3f}{flag}")
+    result["line"] = {
+        "size": list(target_img.size),
+        "points": {k: [round(cx, 1), round(cy, 1)] for k, ((cx, cy), _) in found.items()},
+    }
+
+    # 2. Renders - every render is matched; the per-button median is used. Each state's
+    # templates come from the reference render of the same state: lit LEDs and steam look
+    # nothing like the unlit ones and would match elsewhere.
+    ref_size, ref_points = render_ref
+    per_render = {}
+    render_size = None
+    templates = None
+    for key, filename in RENDER_FILES.items():
+        path = os.path.join(args.images, "Renders", filename)
+        if not os.path.exists(path):
+            print(f"Warning: Render file not found: {path}")
+            continue
+        target_img = load_gray(path)
+        ref_path = os.path.join(args.reference, "Renders", filename)
+        if not os.path.exists(ref_path):
+            print(f"Warning: No reference render for '{key}', using alloff.jpg")
+            ref_path = os.path.join(args.reference, "Renders", RENDER_FILES["alloff"])
+        ref_img = load_gray(ref_path)
+        points = {k: (x * ref_img.width / ref_size[0], y * ref_img.height / ref_size[1]) for k, (x, y) in ref_points.items()}
+        templates = cut_templates(ref_img, points, target_img.width / ref_img.width)
+        if render_size is None:
+            render_size = target_img.size
+        print(f"Render '{key}': {target_img.size}")
+        found = calibrate_image(target_img, templates)
+        for name, ((cx, cy), score) in found.items():
+            print(f"  {name:<12} ({cx:7.1f}, {cy:7.1f})  score={score:.3f}")
+        per_render[key] = found
+
+    if per_render:
+        render_points = {}
+        for name in templates:
+            # Best-scoring renders only (lit/unlit LEDs can weaken a match)
+            hits = [found[name] for found in per_render.values()]
+            best = max(score for _, score in hits)
+            good = [pos for pos, score in hits if score >= best - 0.1]
+            if best < args.min_score:
+                ok = False
+                print(f"  {name}: best render score {best:.3f}  <-- LOW SCORE")
+            render_points[name] = [round(float(np.median([p[0] for p in good])), 1),
+                                   round(float(np.median([p[1] for p in good])), 1)]
+        result["render"] = {"size": list(render_size), "points": render_points}
+
+    out_path = args.out or os.path.join(args.images, CALIBRATION_FILE)
+    with open(out_path, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"\nWrote {out_path} in {time.perf_counter() - t_start:.1f}s")
+    if not ok:
+        print("Some buttons matched poorly - check them with coordinate_finder.py")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import argparse
+import html
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from integrated_gui import SteamerGUI, STEAM_EMITTERS
+from steam_particles import SteamParticles
+
+# Golden-frame regression harness.
+#
+# Renders every simulator state in both views at several scales, headlessly, and
+# compares each frame against a stored golden image. Rendering is spread over a
+# process pool (one task per view/scale, so scaled assets are built once per task).
+#
+#   python golden_frames.py --update     # on a known-good tree: (re)write the goldens
+#   python golden_frames.py              # after a change: compare, write a diff report
+#
+# Failures are written to the report directory (actual frame + diff heatmap) with an
+# index.html overview. The exit code is non-zero when any frame fails.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCALES = [0.5, 1.0, 1.5]
+PULSE_LEVELS = [0.2, 0.6, 1.0]
+
+# Steam is simulated deterministically: fixed seed, fixed steps, no frame budget
+STEAM_SEED = 1234
+STEAM_WARMUP_STEPS = 30
+
+# Comparison thresholds
+PIXEL_TOL = 8 # Per-pixel channel difference treated as noise
+MAX_BAD_FRACTION = 0.001 # Fraction of pixels allowed above PIXEL_TOL
+PERCEPTUAL_BLOCK = 4 # Luma is box-averaged over NxN blocks ...
+PERCEPTUAL_TOL = 6.0 # ... and may differ by at most this much
+
+
+def enumerate_states():
+    """Every reachable combination -> [(name, state dict)]"""
+    states = [("off", dict(power=False, mode=1, target=1, heating=False, hold=False, pulse=0.0))]
+    for target, label in ((1, "power"), (2, "boost")):
+        for pulse in PULSE_LEVELS:
+            for hold in (False, True):
+                name = f"heat-{label}-pulse{pulse:.1f}" + ("-hold" if hold else "")
+                states.append((name, dict(power=True, mode=1, target=target, heating=True, hold=hold, pulse=pulse)))
+    for mode, label in ((1, "normal"), (2, "boost")):
+        for hold in (False, True):
+            name = label + ("-steam" if hold else "")
+            states.append((name, dict(power=True, mode=mode, target=mode, heating=False, hold=hold, pulse=1.0)))
+    return states
+
+
+def apply_state(sim, view, state):
+    sim.power_on = state["power"]
+    sim.mode = state["mode"]
+    sim.target_mode = state["target"]
+    sim.is_heating = state["heating"]
+    sim.hold_active = state["hold"]
+    sim.pulse_intensity = state["pulse"]
+
+    sim.steam = SteamParticles(seed=STEAM_SEED, budget_ms=float("inf"))
+    sim.steam.set_emitter(*STEAM_EMITTERS[view])
+    sim.steam_animating = state["hold"]
+    if state["hold"]:
+        for _ in range(STEAM_WARMUP_STEPS):
+            sim.steam.step(1.0 / 30, boost=(sim.mode == 2))
+
+
+def frame_path(root, view, scale, name):
+    return os.path.join(root, view, f"{scale:g}", name + ".png")
+
+
+def compare(golden, actual):
+    """-> (passed, stats dict, per-pixel diff array or None)"""
+    if golden.size != actual.size:
+        return False, {"reason": f"size {actual.size} != golden {golden.size}"}, None
+
+    a = np.asarray(golden.convert("RGBA"), dtype=np.int16)
+    b = np.asarray(actual.convert("RGBA"), dtype=np.int16)
+    diff = np.abs(a - b).max(axis=2)
+    bad_fraction = float((diff > PIXEL_TOL).mean())
+
+    # Perceptual check: block-averaged luma, insensitive to sub-pixel resampling noise
+    def luma_blocks(x):
+        y = 0.299 * x[..., 0] + 0.587 * x[..., 1] + 0.114 * x[..., 2]
+        n = PERCEPTUAL_BLOCK
+        h, w = (y.shape[0] // n) * n, (y.shape[1] // n) * n
+        return y[:h, :w].reshape(h // n, n, w // n, n).mean(axis=(1, 3))
+
+    perceptual = float(np.abs(luma_blocks(a) - luma_blocks(b)).max())
+
+    stats = {"max": int(diff.max()), "bad_fraction": bad_fraction, "perceptual": perceptual}
+    passed = bad_fraction <= MAX_BAD_FRACTION and perceptual <= PERCEPTUAL_TOL
+    return passed, stats, diff
+
+
+def heatmap(golden, diff):
+    """Diff magnitude (black -> red -> yellow) over a dimmed copy of the golden frame"""
+    d = np.clip(diff.astype(np.float32) * 4.0, 0, 510)
+    heat = np.zeros(diff.shape + (3,), dtype=np.uint8)
+    heat[..., 0] = np.minimum(d, 255)
+    heat[..., 1] = np.clip(d - 255, 0, 255)
+    base = np.asarray(golden.convert("RGB"), dtype=np.float32) * 0.3
+    out = np.maximum(base, heat.astype(np.float32)).astype(np.uint8)
+    return Image.fromarray(out, "RGB")
+
+
+# -----------------
+# Worker process
+# -----------------
+_sim = None
+
+
+def _init_worker():
+    global _sim
+    _sim = SteamerGUI.headless()
+
+
+def run_task(view, scale, states, golden_dir, report_dir, update):
+    sim = _sim
+    sim.apply_view_mode(view == "render")
+    sim.current_scale = scale
+    sim.cache_scaled_assets()
+
+    results = []
+    for name, state in states:
+        apply_state(sim, view, state)
+        sim.compose_frame()
+        frame = sim.current_processed_image
+        path = frame_path(golden_dir, view, scale, name)
+        entry = {"view": view, "scale": scale, "name": name}
+
+        if update:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            frame.save(path, compress_level=1)
+            entry["status"] = "updated"
+        elif not os.path.exists(path):
+            entry["status"] = "missing"
+        else:
+            golden = Image.open(path)
+            passed, stats, diff = compare(golden, frame)
+            entry.update(stats)
+            entry["status"] = "pass" if passed else "FAIL"
+            if not passed:
+                out = frame_path(report_dir, view, scale, name)
+                os.makedirs(os.path.dirname(out), exist_ok=True)
+                frame.save(out.replace(".png", ".actual.png"), compress_level=1)
+                if diff is not None:
+                    heatmap(golden, diff).save(out.replace(".png", ".diff.png"), compress_level=1)
+                entry["golden"] = path
+                entry["actual"] = out.replace(".png", ".actual.png")
+                entry["diff"] = out.replace(".png", ".diff.png") if diff is not None else None
+        results.append(entry)
+    return results
+
+
+# -----------------
+# Report
+# -----------------
+def write_report(report_dir, results):
+    failed = [r for r in results if r["status"] == "FAIL"]
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, "index.html")
+
+    def img(src):
+        if not src:
+            return "-"
+        rel = os.path.relpath(src, report_dir)
+        return f'<a href="{html.escape(rel)}"><img src="{html.escape(rel)}" width="360"></a>'
+
+    rows = []
+    for r in failed:
+        detail = r.get("reason") or (f"max {r['max']}, {r['bad_fraction'] * 100:.3f}% px &gt; {PIXEL_TOL}, "
+                                     f"perceptual {r['perceptual']:.1f}")
+        rows.append(f"<tr><td>{r['view']} @ {r['scale']:g}<br><b>{html.escape(r['name'])}</b><br>{detail}</td>"
+                    f"<td>{img(r['golden'])}</td><td>{img(r['actual'])}</td><td>{img(r.get('diff'))}</td></tr>")
+
+    with open(path, "w") as f:
+        f.write("<html><head><title>Golden frame report</title></head><body style='font-family:sans-serif'>")
+        f.write(f"<h2>{len(failed)} of {len(results)} frames failed</h2>")
+        if rows:
+            f.write("<table border=1 cellpadding=4><tr><th>Frame</th><th>Golden</th><th>Actual</th><th>Diff</th></tr>")
+            f.write("\n".join(rows))
+            f.write("</table>")
+        f.write("</body></html>")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render every state and compare against golden frames")
+    parser.add_argument("--update", action="store_true", help="Write current frames as the new goldens")
+    parser.add_argument("--scales", type=float, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--views", nargs="+", default=["line", "render"], choices=["line", "render"])
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--golden-dir", default=os.path.join(BASE_DIR, "golden"))
+    parser.add_argument("--report-dir", default=os.path.join(BASE_DIR, "golden_report"))
+    args = parser.parse_args()
+
+    t_start = time.perf_counter()
+    states = enumerate_states()
+    tasks = [(view, scale) for view in args.views for scale in args.scales]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker) as pool:
+        futures = [pool.submit(run_task, view, scale, states, args.golden_dir, args.report_dir, args.update)
+                   for view, scale in tasks]
+        for future in futures:
+            results.extend(future.result())
+
+    elapsed = time.perf_counter() - t_start
+    if args.update:
+        print(f"Wrote {len(results)} golden frames to {args.golden_dir} in {elapsed:.1f}s")
+        return 0
+
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+        if r["status"] != "pass":
+            print(f"  {r['status']:<8}{r['view']:<8}{r['scale']:<6g}{r['name']}")
+    summary = ", ".join(f"{v} {k}" for k, v in sorted(counts.items()))
+    print(f"{len(results)} frames in {elapsed:.1f}s: {summary}")
+
+    if counts.get("FAIL"):
+        print(f"Report: {write_report(args.report_dir, results)}")
+        return 1
+    if counts.get("missing"):
+        print("Some goldens are missing - run with --update on a known-good tree")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import argparse
+import math
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+from integrated_gui import SteamerGUI, image_nbytes
+from attract_mode import PULSE_STEPS
+from metrics import MetricsExporter
+
+# Multi-device grid: N independent simulators in one window, e.g. for training rooms.
+#
+#   python grid_view.py --count 4 [--columns 2]
+#
+# Each tile is a SteamerGUI with its own state, timers and canvas. Everything that does
+# not depend on a tile's state lives once in SharedAssets:
+#   - sources: line drawing + render pyramids, sprites, layout-space points
+#   - scaled asset sets, from the prototype's scale-bucketed LRU (tiles of equal size
+#     share one set)
+#   - finished frames, keyed by (scale, frame_key()) - a tile whose state another tile
+#     has already shown just swaps the frame in
+# So N tiles in the same state cost about one composite plus N incremental uploads.
+# Tiles draw steam with the static sprite (particles are per-tile and uncacheable) and
+# quantise the heating pulse to the frame key's PULSE_STEPS levels.
+
+# Read-only attributes a tile takes from the prototype after load_assets()
+SOURCE_ATTRS = (
+    "image_path", "asset_sources", "asset_store",
+    "base_image_original", "base_pyramid", "line_vector", "orig_w", "orig_h",
+    "line_points", "render_points", "line_radius", "render_radius", "current_base_radius",
+    "render_images", "render_pyramids", "render_base_pyramid", "render_deltas",
+    "glow_sprite", "steam_sprites",
+)
+MAX_FRAMES = 96 # Finished frames kept, least recently used first out
+
+
+class SharedAssets:
+    def __init__(self, max_frames=MAX_FRAMES):
+        self.prototype = SteamerGUI.headless() # Loads sources once; owns the scaled-set LRU
+        self.metrics = self.prototype.metrics
+        self.max_frames = max_frames
+        self.frames = OrderedDict() # (scale, frame key) -> (image, source, dirty rects)
+        self.stats = {"hit": 0, "miss": 0}
+        self.metrics.declare("steamer_grid_frame_cache_total", "counter", "Shared grid frame lookups (hit/miss)")
+
+    def scaled_assets(self, scale):
+        """{attribute: value} of the scaled asset set for 'scale'"""
+        proto = self.prototype
+        proto.current_scale = scale
+        proto.cache_scaled_assets()
+        entry = proto.scaled_sets.get(scale)
+        return entry[0] if entry else {}
+
+    def get_frame(self, key):
+        frame = self.frames.get(key)
+        result = "miss" if frame is None else "hit"
+        self.stats[result] += 1
+        self.metrics.inc("steamer_grid_frame_cache_total", result=result)
+        if frame is not None:
+            self.frames.move_to_end(key)
+        return frame
+
+    def put_frame(self, key, frame):
+        self.frames[key] = frame
+        while len(self.frames) > self.max_frames:
+            self.frames.popitem(last=False)
+
+    def nbytes(self):
+        # Render-view frames are the scaled renders themselves - count composited ones only
+        frames = [f[0] for f in self.frames.values() if f[0] is not f[1]]
+        return sum(nbytes for _, nbytes in self.prototype.scaled_sets.values()), image_nbytes(frames)
+
+
+class GridTile(SteamerGUI):
+    """One simulator in the grid: own state and canvas, assets from SharedAssets"""
+
+    def __init__(self, root, parent, shared, title):
+        self.root = root
+        self.shared = shared
+        self.init_state()
+        self.metrics = shared.metrics
+        for name in SOURCE_ATTRS:
+            setattr(self, name, getattr(shared.prototype, name))
+        self.original_points = self.line_points.copy()
+        self.static_steam = True
+
+        tk.Label(parent, text=title, bg="#000000", fg="#666666", font=("Segoe UI", 9, "bold")).pack(side="top")
+        self.canvas = tk.Canvas(parent, bg="#000000", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+        self.image_id = self.canvas.create_image(0, 0, anchor="center")
+
+        self.tk_image = None
+        self.tk_staging = None
+        self.displayed_source = None
+        self.displayed_rects = []
+        self.incremental_upload = True
+        self.upload_stats = {"frames": 0, "pixels": 0, "seconds": 0.0}
+
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.canvas.bind("<Button-1>", self.on_canvas_click)
+        self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
+
+    def cache_scaled_assets(self):
+        for name, value in self.shared.scaled_assets(self.current_scale).items():
+            setattr(self, name, value)
+
+    def compose_frame(self):
+        key = (self.current_scale, self.frame_key())
+        frame = self.shared.get_frame(key)
+        if frame is None:
+            # Composite at the pulse level the key stands for, so every tile sharing
+            # the frame sees the same thing
+            pulse = self.pulse_intensity
+            if self.is_heating:
+                self.pulse_intensity = 0.2 + 0.8 * key[1][5] / (PULSE_STEPS - 1)
+            super().compose_frame()
+            self.pulse_intensity = pulse
+            frame = (self.current_processed_image, self.current_frame_source, list(self.current_dirty_rects))
+            self.shared.put_frame(key, frame)
+        self.current_processed_image, self.current_frame_source, rects = frame
+        self.current_dirty_rects = list(rects)
+
+    def render_frame(self):
+        # No toolbar LEDs or flowchart per tile
+        self.redraw_pending = False
+        self.redraw_stats["frames"] += 1
+        self.compose_frame()
+        self.latency.mark("composite")
+        self.display_current_image()
+        self.latency.finish()
+
+    def toggle_view_mode(self):
+        self.latency.begin("view")
+        self.apply_view_mode(not self.use_renders)
+        self.refresh_ui()
+
+
+class SteamerGrid:
+    def __init__(self, root, count, columns=None):
+        self.root = root
+        self.root.title(f"Steamer Interactive GUI - {count} simulators")
+        sw, sh = root.winfo_screenwidth(), root.winfo_screenheight()
+        w, h = int(sw * 0.9), int(sh * 0.85)
+        self.root.geometry(f"{w}x{h}+{(sw - w) // 2}+{(sh - h) // 2}")
+        self.root.configure(bg="#000000")
+
+        self.shared = SharedAssets()
+
+        controls = tk.Frame(root, padx=20, pady=10, bg="#2b2b2b")
+        controls.pack(side="top", fill="x")
+        tk.Label(controls, text="Click the buttons on each product image. Each steamer runs independently.",
+                 bg="#2b2b2b", fg="#888888", font=("Segoe UI", 9, "bold")).pack(side="left")
+        ttk.Button(controls, text="SWITCH ALL VIEWS", command=self.toggle_all_views).pack(side="right")
+
+        grid = tk.Frame(root, bg="#000000")
+        grid.pack(side="bottom", fill="both", expand=True)
+        columns = columns or math.ceil(math.sqrt(count))
+        rows = math.ceil(count / columns)
+        for c in range(columns):
+            grid.columnconfigure(c, weight=1, uniform="tile")
+        for r in range(rows):
+            grid.rowconfigure(r, weight=1, uniform="tile")
+
+        self.tiles = []
+        for i in range(count):
+            cell = tk.Frame(grid, bg="#000000")
+            cell.grid(row=i // columns, column=i % columns, sticky="nsew", padx=2, pady=2)
+            self.tiles.append(GridTile(root, cell, self.shared, f"STEAMER {i + 1}"))
+
+        self.root.bind("<F9>", lambda e: self.report())
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.metrics_exporter = MetricsExporter(self.shared.metrics) if self.shared.metrics.enabled else None
+
+    def toggle_all_views(self):
+        for tile in self.tiles:
+            tile.toggle_view_mode()
+
+    def report(self):
+        """Print shared cache sizes and hit rates (F9, also on close)"""
+        s = self.shared.stats
+        proto = self.shared.prototype
+        source_bytes = image_nbytes([proto.base_pyramid, proto.line_vector, proto.render_pyramids,
+                                     proto.render_base_pyramid, proto.render_deltas, proto.glow_sprite,
+                                     proto.steam_sprites])
+        scaled_bytes, frame_bytes = self.shared.nbytes()
+        photo_bytes = sum(image_nbytes([t.tk_image, t.tk_staging]) for t in self.tiles)
+        frames = s["hit"] + s["miss"]
+        print("\n".join([
+            "", f"=== Steamer Grid ({len(self.tiles)} simulators) ===",
+            f"  Shared sources: {source_bytes / 1048576:.1f} MB",
+            f"  Scaled sets: {len(proto.scaled_sets)} ({scaled_bytes / 1048576:.1f} MB)",
+            f"  Frames cached: {len(self.shared.frames)} ({frame_bytes / 1048576:.1f} MB), "
+            f"hit rate {s['hit'] / max(1, frames) * 100:.0f}% of {frames}",
+            f"  Tile photos: {photo_bytes / 1048576:.1f} MB",
+        ]))
+
+    def on_close(self):
+        self.report()
+        if self.metrics_exporter:
+            self.metrics_exporter.close()
+        self.root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Several independent steamer simulators in one window")
+    parser.add_argument("--count", type=int, default=4)
+    parser.add_argument("--columns", type=int, default=None)
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    SteamerGrid(root, max(1, args.count), args.columns)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
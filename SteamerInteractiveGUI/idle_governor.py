@@ -0,0 +1,105 @@
+import ctypes
+import gc
+import os
+import time
+
+# Idle power saving.
+#
+# After STEAMER_IDLE_SLEEP seconds without input and with nothing animating, the
+# simulator goes to sleep. The default is 600 s, or off when attract mode is on, so a
+# kiosk keeps demonstrating; 0 turns it off. Set both and the sleep time caps the demo:
+# it counts from the last real input, and a demo still running then is stopped (back to
+# power-off) before the simulator sleeps. On sleep:
+#   - the attract countdown is cancelled, so no timers remain
+#   - scaled assets, frame buffers and cached frames are released; the Tk photo on the
+#     canvas keeps the picture, so the window still repaints
+#   - pages of the shared asset store are dropped from this process (MADV_DONTNEED);
+#     they stay in the page cache and fault back in on demand. Without a store the
+#     decoded full-resolution pyramids are kept - re-decoding would not be a quick wake.
+#   - freed heap is handed back to the OS (glibc malloc_trim)
+#   - <Configure> only records the new scale instead of rescaling
+#
+# Pointer motion, a click or a key press wakes it. So does any refresh_ui: assets are
+# rebuilt at the current scale before the next frame is composited. Motion usually
+# arrives before the click, which hides the rebuild.
+
+DEFAULT_SLEEP_SECONDS = 600
+BUSY_RECHECK_MS = 5000 # While heating/steam/redraw keeps the app busy
+
+
+def sleep_seconds_from_env(attract_enabled=False):
+    default = 0.0 if attract_enabled else DEFAULT_SLEEP_SECONDS
+    try:
+        return float(os.environ.get("STEAMER_IDLE_SLEEP", default))
+    except ValueError:
+        return default
+
+
+def trim_heap():
+    """Return free heap pages to the OS (glibc only; no-op elsewhere)"""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class IdleGovernor:
+    def __init__(self, gui, idle_seconds):
+        self.gui = gui
+        self.idle_seconds = idle_seconds
+        self.sleeping = False
+        self.last_input = time.monotonic()
+        self.timer = None
+
+        for sequence in ("<ButtonPress>", "<KeyPress>", "<Motion>"):
+            gui.root.bind_all(sequence, self.note_input, add="+")
+        self.arm(int(idle_seconds * 1000))
+
+    def arm(self, delay_ms):
+        if self.timer:
+            self.gui.root.after_cancel(self.timer)
+        self.timer = self.gui.root.after(delay_ms, self.check)
+
+    def note_input(self, event=None):
+        # Cheap on purpose: runs for every motion event
+        self.last_input = time.monotonic()
+        if self.sleeping:
+            self.gui.refresh_ui() # Wakes us (see SteamerGUI.refresh_ui)
+
+    def check(self):
+        """Timer: sleep if idle long enough, else wait for the remainder"""
+        self.timer = None
+        gui = self.gui
+        remaining = self.idle_seconds - (time.monotonic() - self.last_input)
+        if remaining > 0:
+            self.arm(int(remaining * 1000) + 1)
+            return
+        if gui.attract and gui.attract.active:
+            gui.attract.stop() # Powers off; sleep once that frame is on screen
+            self.arm(BUSY_RECHECK_MS)
+            return
+        if gui.is_heating or gui.steam_animating or gui.redraw_pending:
+            self.arm(BUSY_RECHECK_MS)
+            return
+        self.sleep()
+
+    def sleep(self):
+        gui = self.gui
+        self.sleeping = True
+        if gui.attract:
+            gui.attract.suspend()
+        gui.release_scaled_assets()
+        gc.collect()
+        trim_heap()
+        gui.metrics.set("steamer_idle_sleeping", 1)
+
+    def wake(self):
+        gui = self.gui
+        self.sleeping = False
+        t0 = time.perf_counter()
+        gui.cache_scaled_assets()
+        gui.metrics.observe("steamer_idle_wake_seconds", time.perf_counter() - t0)
+        gui.metrics.set("steamer_idle_sleeping", 0)
+        if gui.attract:
+            gui.attract.arm()
+        self.arm(int(self.idle_seconds * 1000))
@@ -5,6 +5,67 @@ import math
 import sys
 import os
 import time
+import gc
+import json
+import tracemalloc
+from collections import OrderedDict
+
+from asset_store import ASSET_STORE_FILE, open_asset_store
+from render_delta import apply_render_delta
+from vector_drawing import CACHE_FILE as VECTOR_CACHE_FILE, PDF_FILE, VectorDrawing, vector_lines_enabled
+from steam_particles import SteamParticles
+from latency_trace import LatencyTracer
+from metrics import Metrics, MetricsExporter, metrics_enabled, timed
+from attract_mode import AttractMode, PULSE_STEPS, idle_seconds_from_env
+from idle_governor import IdleGovernor, sleep_seconds_from_env
+from prefetch import Prefetcher, prefetch_enabled
+
+# Button centres for LINE DRAWING mode, in reference pixels (4000x2110px)
+LINE_REFERENCE_SIZE = (4000, 2110)
+LINE_POINTS = {
+    "Power": (597, 669),
+    "Boost": (597, 800),
+    "Hold": (1776, 877), # Middle/Front View Trigger
+    "Steam": (1776, 350), # Estimated Nozzle (Top of Front View)
+    "Power_Side": (2634, 674),
+    "Boost_Side": (2637, 797),
+    "Hold_Side": (2914, 872)
+}
+
+# Button centres for RENDER mode (Photo Realistic), in reference pixels (3840x2158)
+RENDER_REFERENCE_SIZE = (3840, 2158)
+RENDER_POINTS = {
+    "Power": (898, 833),
+    "Boost": (898, 944),
+    "Hold": (1931, 1008),
+    "Power_Side": (2688, 809),
+    "Boost_Side": (2688, 925),
+    "Hold_Side": (2883, 987),
+    "Steam": (3195, 555) # Side view nozzle
+}
+
+# Steam emitter per view: (direction, spread in radians)
+STEAM_EMITTERS = {
+    "line": ((0.0, -1.0), 1.4), # Front nozzle faces the viewer - wide puff drifting up
+    "render": ((1.0, -0.2), 0.35) # Side nozzle blows to the right
+}
+
+# Written by auto_calibrate.py; overrides the defaults above when present
+CALIBRATION_FILE = "calibration.json"
+
+# Display scales snap down to ~2% buckets; whole scaled asset sets are kept per bucket
+# in an LRU capped at this many MB (STEAMER_SCALED_CACHE_MB overrides)
+SCALE_BUCKET_RATIO = 1.02
+SCALED_CACHE_MB = 256
+
+# Pre-rendered images for the realistic view mode (Renders/ folder)
+RENDER_FILES = {
+    "alloff": "alloff.jpg",
+    "on": "on.jpg",
+    "onwithsteam": "onwithsteam.jpg",
+    "onwithboost": "onwithboost.jpg",
+    "onboostwithsteam": "onboostwithsteam.jpg"
+}
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -16,6 +77,123 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
+def asset_sources(image_path):
+    """Source files for every asset: {"line": path, "render/<key>": path}"""
+    render_dir = os.path.join(os.path.dirname(image_path), "Renders")
+    if not os.path.exists(render_dir):
+        # Fallback if running from a different context
+        render_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Renders")
+    sources = {"line": image_path}
+    for key, filename in RENDER_FILES.items():
+        sources["render/" + key] = os.path.join(render_dir, filename)
+    return sources
+
+def load_line_drawing(path):
+    """Load the line drawing inverted to match the Web Version (White Lines on Black BG)"""
+    raw_img = Image.open(path).convert("RGBA")
+    # This replicates the "Process" used in the web app
+    if raw_img.mode == 'RGBA':
+        r, g, b, a = raw_img.split()
+        rgb_img = Image.merge('RGB', (r, g, b))
+        inverted_rgb = ImageOps.invert(rgb_img)
+        r2, g2, b2 = inverted_rgb.split()
+        return Image.merge('RGBA', (r2, g2, b2, a))
+    return ImageOps.invert(raw_img.convert('RGB')).convert('RGBA')
+
+def load_calibration(path):
+    """Load a calibration file -> {"line"/"render": (reference size, points)}, or None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        result = {}
+        for view in ("line", "render"):
+            if view in data:
+                size = tuple(data[view]["size"])
+                points = {k: tuple(v) for k, v in data[view]["points"].items()}
+                result[view] = (size, points)
+        return result
+    except Exception as e:
+        print(f"Warning: Ignoring calibration file {path}: {e}")
+        return None
+
+def build_mip_pyramid(img, min_dim=64):
+    """Build a mip chain (full, 1/2, 1/4, ...) of an image, largest level first"""
+    levels = [img]
+    while min(levels[-1].size) // 2 >= min_dim:
+        # Box-filtered 2x reduction - cheap and alias-free for halving
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+def pick_mip_level(levels, size):
+    """Index of the smallest pyramid level that still covers 'size'"""
+    index = 0
+    for i, level in enumerate(levels):
+        if level.width >= size[0] and level.height >= size[1]:
+            index = i
+        else:
+            break
+    return index
+
+def resize_from_pyramid(levels, size, resample=Image.Resampling.BILINEAR):
+    """Resample to 'size' from the smallest pyramid level that still covers it"""
+    src = levels[pick_mip_level(levels, size)]
+    if src.size == size:
+        return src.copy()
+    return src.resize(size, resample)
+
+def snap_scale(scale):
+    """Largest bucket scale <= 'scale'. Buckets are integer powers of SCALE_BUCKET_RATIO."""
+    return SCALE_BUCKET_RATIO ** math.floor(math.log(scale) / math.log(SCALE_BUCKET_RATIO) + 1e-9)
+
+def scaled_cache_mb_from_env():
+    try:
+        return float(os.environ.get("STEAMER_SCALED_CACHE_MB", SCALED_CACHE_MB))
+    except ValueError:
+        return SCALED_CACHE_MB
+
+def image_nbytes(obj):
+    """Approximate pixel memory held by an image, or a dict/list of images"""
+    if obj is None:
+        return 0
+    if isinstance(obj, dict):
+        return sum(image_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(image_nbytes(v) for v in obj)
+    if isinstance(obj, Image.Image):
+        # Pillow stores RGB/RGBA (and most other modes) as 4 bytes per pixel
+        bpp = {"1": 1, "L": 1, "P": 1, "I;16": 2}.get(obj.mode, 4)
+        return obj.width * obj.height * bpp
+    if isinstance(obj, ImageTk.PhotoImage):
+        # Tk keeps its own 32-bit copy of the pixels
+        return obj.width() * obj.height() * 4
+    if isinstance(obj, VectorDrawing):
+        return obj.nbytes()
+    return 0
+
+def clip_layer(layer, size):
+    """Rect of a (sprite, x, y) layer inside an image of 'size', or None if off-image"""
+    sprite, px, py = layer
+    x1, y1 = max(0, px), max(0, py)
+    x2, y2 = min(size[0], px + sprite.width), min(size[1], py + sprite.height)
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return (x1, y1, x2, y2)
+
+def composite_layers(base, layers):
+    """New image: 'base' with the (sprite, x, y) layers screen-blended on top, in order"""
+    working = base.copy()
+    for layer in layers:
+        box = clip_layer(layer, working.size)
+        if box is None:
+            continue
+        sprite, px, py = layer
+        x1, y1, x2, y2 = box
+        visible = sprite.crop((x1 - px, y1 - py, x2 - px, y2 - py))
+        working.paste(ImageChops.screen(working.crop(box), visible), (x1, y1))
+    return working
+
 class SteamerGUI:
     def __init__(self, root):
         self.root = root
@@ -33,64 +211,7 @@ class SteamerGUI:
         y_position = (screen_height - window_height) // 2
         self.root.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
         
-        # -----------------
-        # Configuration
-        # -----------------
-        # Coordinates for LINE DRAWING mode (Recalibrated for 4000x2110px)
-        self.line_points = {
-            "Power": (597, 669),
-            "Boost": (597, 800),
-            "Hold": (1776, 877), # Middle/Front View Trigger
-            "Steam": (1776, 350), # Estimated Nozzle (Top of Front View)
-            "Power_Side": (2634, 674),
-            "Boost_Side": (2637, 797),
-            "Hold_Side": (2914, 872)
-        }
-        
-        # Coordinates for RENDER mode (Photo Realistic)
-        # Recalibrated to 3840x2158
-        self.render_points = {
-            "Power": (898, 833),
-            "Boost": (898, 944),
-            "Hold": (1931, 1008),
-            "Power_Side": (2688, 809),
-            "Boost_Side": (2688, 925),
-            "Hold_Side": (2883, 987)
-        }
-        
-        # Default to line points initially
-        self.original_points = self.line_points.copy()
-        
-        # Radius config
-        self.line_radius = 50 
-        self.render_radius = 45 # Reverted base radius
-        self.current_base_radius = self.line_radius # Active radius setting 
-        
-        # New White/Monochrome styling
-        self.light_colors = {
-            "Power": (255, 255, 255),    # White
-            "Boost": (255, 255, 255),    # White 
-            "Hold": (255, 255, 255),     
-            "Steam": (255, 255, 255),    # Pure White for steam
-            "Power_Side": (255, 255, 255),
-            "Boost_Side": (255, 255, 255)
-        }
-        
-        self.current_scale = 1.0
-        
-        # State
-        self.power_on = False
-        self.mode = 1 
-        self.target_mode = 1 # Target mode after heating
-        self.hold_active = False 
-        self.is_heating = False
-        self.pulse_intensity = 0.0 # 0.0 to 1.0 multiplier
-        self.pulse_phase = 0.0
-
-        # Toggle for Render Mode
-        self.use_renders = False
-        self.render_images = {} # Original loaded images
-        self.scaled_renders = {} # Resized for display
+        self.init_state()
 
         # Pre-cache graphics
         self.cache_assets()
@@ -129,73 +250,7 @@ class SteamerGUI:
         # Load Image
         # -----------------
         try:
-            self.image_path = resource_path("steamer.png")
-            # Load High-Res Image
-            raw_img = Image.open(self.image_path).convert("RGBA")
-            
-            # Processing: Invert colors to match Web Version (White Lines on Black BG)
-            # This replicates the "Process" used in the web app
-            if raw_img.mode == 'RGBA':
-                r, g, b, a = raw_img.split()
-                rgb_img = Image.merge('RGB', (r, g, b))
-                inverted_rgb = ImageOps.invert(rgb_img)
-                r2, g2, b2 = inverted_rgb.split()
-                self.base_image_original = Image.merge('RGBA', (r2, g2, b2, a))
-            else:
-                self.base_image_original = ImageOps.invert(raw_img.convert('RGB')).convert('RGBA')
-            
-            # COORDINATE SCALING Logic
-            # 1. Adapt to new image resolution (Reference: 4000x2110)
-            self.orig_w, self.orig_h = self.base_image_original.size
-            xref = 4000.0
-            
-            if self.orig_w != xref:
-                scale_factor = self.orig_w / xref
-                # Scale LINE points to match the loaded image resolution
-                for k in self.line_points:
-                    px, py = self.line_points[k]
-                    self.line_points[k] = (px * scale_factor, py * scale_factor)
-            
-            # 2. Optimization: Downscale if too large for display (Max 1600px)
-            max_dim = 1600
-            w, h = self.base_image_original.size
-            if w > max_dim or h > max_dim:
-                ratio = min(max_dim/w, max_dim/h)
-                new_size = (int(w*ratio), int(h*ratio))
-                self.base_image_original = self.base_image_original.resize(new_size, Image.Resampling.LANCZOS)
-                
-                # Apply downscale ratio to LINE points
-                for k in self.line_points:
-                    px, py = self.line_points[k]
-                    self.line_points[k] = (px * ratio, py * ratio)
-                
-                # Apply Separate Scaling for Render Points (Reference: 3840x2158)
-                # We need to map 3840x2158 space -> new_size (which matches Line Drawing aspect)
-                # This accounts for the slight stretch/squash applied to renders
-                xref_render = 3840.0
-                yref_render = 2158.0
-                
-                ratio_rx = new_size[0] / xref_render
-                ratio_ry = new_size[1] / yref_render
-                
-                for k in self.render_points:
-                    px, py = self.render_points[k]
-                    self.render_points[k] = (px * ratio_rx, py * ratio_ry)
-
-                self.line_radius *= ratio 
-                self.render_radius *= ratio_rx # Scale radius by Width ratio roughly
-                self.current_base_radius = self.line_radius
-            
-            # Set Active Points
-            self.original_points = self.line_points.copy()
-            
-            self.current_processed_image = self.base_image_original.copy()
-            self.orig_w, self.orig_h = self.base_image_original.size
-            
-            # Load additional renders now that we have the base path
-            self.load_renders()
-            self.cache_assets() # Re-cache with renders
-            
+            self.load_assets()
         except Exception as e:
             messagebox.showerror("Error", f"Could not load image.\nError: {e}")
             root.destroy()
@@ -206,47 +261,305 @@ class SteamerGUI:
         self.canvas.pack(fill="both", expand=True)
         self.image_id = self.canvas.create_image(0, 0, anchor="center")
         
+        # Persistent Tk photo (reallocated only on scale change) + staging photo
+        # for sub-region uploads. STEAMER_FULL_UPLOAD restores the old path for A/B timing.
+        self.tk_image = None
+        self.tk_staging = None
+        self.displayed_source = None
+        self.displayed_rects = []
+        self.incremental_upload = not os.environ.get("STEAMER_FULL_UPLOAD")
+        self.upload_stats = {"frames": 0, "pixels": 0, "seconds": 0.0}
+        
         # Bind events
         self.canvas.bind("<Configure>", self.on_resize)
         self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
         
+        # Memory diagnostics (F9 = report, also printed on exit)
+        self.memory_snapshot = None
+        if os.environ.get("STEAMER_TRACEMALLOC"):
+            tracemalloc.start()
+            self.memory_snapshot = tracemalloc.take_snapshot()
+        self.root.bind("<F9>", lambda e: self.report_memory())
+        self.root.bind("<F10>", lambda e: self.report_latency())
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Prometheus metrics (STEAMER_METRICS_PORT / STEAMER_METRICS_FILE)
+        self.metrics_exporter = MetricsExporter(self.metrics) if self.metrics.enabled else None
+        
+        # Demo loop after inactivity (STEAMER_ATTRACT_IDLE seconds; unset or 0 = off)
+        idle_seconds = idle_seconds_from_env()
+        self.attract = AttractMode(self, idle_seconds) if idle_seconds > 0 else None
+        
+        # Shed caches and timers when nobody is around (STEAMER_IDLE_SLEEP seconds, 0 = off;
+        # off by default while attract mode is on)
+        sleep_seconds = sleep_seconds_from_env(self.attract is not None)
+        self.governor = IdleGovernor(self, sleep_seconds) if sleep_seconds > 0 else None
+        
+        # Composite the frames one input away in idle time (STEAMER_PREFETCH=0 = off)
+        self.prefetcher = Prefetcher(self) if prefetch_enabled() else None
+        
         # Initial Draw
         self.refresh_ui()
 
+    def init_state(self):
+        """Configuration and simulator state (no Tk widgets)"""
+        # -----------------
+        # Configuration
+        # -----------------
+        # Button coordinates for both views (built-in defaults or calibration file)
+        self.line_ref_size = LINE_REFERENCE_SIZE
+        self.line_points = dict(LINE_POINTS)
+        self.render_ref_size = RENDER_REFERENCE_SIZE
+        self.render_points = dict(RENDER_POINTS)
+        
+        calibration = load_calibration(resource_path(CALIBRATION_FILE))
+        if calibration:
+            if "line" in calibration:
+                self.line_ref_size, points = calibration["line"]
+                self.line_points.update(points)
+            if "render" in calibration:
+                self.render_ref_size, points = calibration["render"]
+                self.render_points.update(points)
+        
+        # Default to line points initially
+        self.original_points = self.line_points.copy()
+        
+        # Radius config
+        self.line_radius = 50 
+        self.render_radius = 45 # Reverted base radius
+        self.current_base_radius = self.line_radius # Active radius setting 
+        
+        # New White/Monochrome styling
+        self.light_colors = {
+            "Power": (255, 255, 255),    # White
+            "Boost": (255, 255, 255),    # White 
+            "Hold": (255, 255, 255),     
+            "Steam": (255, 255, 255),    # Pure White for steam
+            "Power_Side": (255, 255, 255),
+            "Boost_Side": (255, 255, 255)
+        }
+        
+        self.current_scale = 1.0
+        
+        # State
+        self.power_on = False
+        self.mode = 1 
+        self.target_mode = 1 # Target mode after heating
+        self.hold_active = False 
+        self.is_heating = False
+        self.pulse_intensity = 0.0 # 0.0 to 1.0 multiplier
+        self.pulse_phase = 0.0
+        
+        # Redraws are coalesced: refresh_ui only marks the view dirty
+        self.redraw_pending = False
+        self.redraw_stats = {"requests": 0, "frames": 0}
+        
+        # Input -> canvas latency per interaction (F10 = report)
+        self.latency = LatencyTracer()
+        
+        # Fleet metrics (opt-in, see metrics.py; exported by the windowed app only)
+        self.metrics = Metrics(enabled=metrics_enabled())
+        self.declare_metrics()
+        
+        # Animated steam (runs while holding, then fades out)
+        self.steam = SteamParticles()
+        self.steam.set_emitter(*STEAM_EMITTERS["line"])
+        self.steam_animating = False
+        self.steam_step_delay = int(1000 / 30)
+        self.static_steam = False # Sprite instead of particles (attract mode)
+
+        # Pre-composited frames by frame_key(), filled by attract mode or the prefetcher (None = off)
+        self.frame_cache = None
+        
+        # Attract mode / idle power saving / prefetch (windowed app only, see __init__)
+        self.attract = None
+        self.governor = None
+        self.prefetcher = None
+
+        # Vector line drawing, rasterised per scale (STEAMER_VECTOR_LINES, see vector_drawing.py).
+        # Replaces base_image_original/base_pyramid when loaded.
+        self.line_vector = None
+
+        # Toggle for Render Mode
+        self.use_renders = False
+        self.render_images = {} # Original loaded images
+        self.render_pyramids = {} # Mip chains of the originals
+        self.render_base_pyramid = None # Delta-encoded renders (asset store): shared base ...
+        self.render_deltas = {} # ... and per-state patches [(box, inner, levels)]
+        self.scaled_renders = {} # Resized for display
+        
+        # Complete scaled asset sets by scale, least recently used first (see cache_scaled_assets)
+        self.scaled_sets = OrderedDict()
+        self.scaled_cache_budget = scaled_cache_mb_from_env() * 1048576
+
+    def declare_metrics(self):
+        m = self.metrics
+        m.declare("steamer_frame_seconds", "histogram", "Time to composite and upload one frame (render_frame)")
+        m.declare("steamer_redraw_requests_total", "counter", "Redraw requests (refresh_ui), before coalescing")
+        m.declare("steamer_light_layer_seconds", "histogram", "Line-view frame composition (process_light_layer)")
+        m.declare("steamer_rescale_seconds", "histogram", "Rebuild of all scaled assets (cache_scaled_assets)",
+                  buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+        m.declare("steamer_load_renders_seconds", "histogram", "Loading the render images (load_renders)",
+                  buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+        m.declare("steamer_asset_loads_total", "counter", "Assets loaded, by source (store = mmap cache hit, decode = miss)")
+        m.declare("steamer_scaled_cache_total", "counter",
+                  "Scaled asset set activations: unchanged bucket, LRU hit or rebuild")
+        m.declare("steamer_heating_step_interval_seconds", "histogram", "Time between heating animation steps",
+                  buckets=(0.02, 0.033, 0.04, 0.05, 0.066, 0.1, 0.25, 0.5))
+        m.declare("steamer_heating_fps", "gauge", "Achieved heating step rate over the current/last heat-up")
+        m.declare("steamer_asset_bytes", "gauge", "Approximate pixel memory per asset category")
+        m.declare("steamer_idle_sleeping", "gauge", "1 while the idle governor has released caches")
+        m.declare("steamer_idle_wake_seconds", "histogram", "Asset rebuild time when waking from idle",
+                  buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+        m.declare("steamer_frame_cache_total", "counter", "Frame cache lookups while a cache is active (hit/miss)")
+        m.declare("steamer_prefetched_frames_total", "counter", "Frames composited ahead for states one input away")
+
+    def load_assets(self):
+        """Load the line drawing and renders and map button points into layout space"""
+        self.image_path = resource_path("steamer.png")
+        self.asset_sources = asset_sources(self.image_path)
+        
+        # Decoded pixels shared across processes via mmap (built by asset_store.py).
+        # STEAMER_ASSET_STORE may point at a store outside the app folder.
+        store_path = os.environ.get("STEAMER_ASSET_STORE") or resource_path(ASSET_STORE_FILE)
+        self.asset_store = open_asset_store(store_path, self.asset_sources)
+        
+        if vector_lines_enabled():
+            self.line_vector = self.load_line_vector()
+        if self.line_vector:
+            # No raster at all - points and radii keep the raster export's reference frame
+            self.base_image_original = None
+            self.base_pyramid = None
+            line_size = tuple(int(v) for v in self.line_ref_size)
+        elif self.asset_store and "line" in self.asset_store:
+            # Already inverted and pyramided - no decoding
+            self.base_pyramid = self.asset_store.get("line")
+            self.base_image_original = self.base_pyramid[0]
+            self.metrics.inc("steamer_asset_loads_total", asset="line", source="store")
+        else:
+            # Load High-Res Image (inverted: White Lines on Black BG)
+            self.base_image_original = load_line_drawing(self.image_path)
+            self.base_pyramid = build_mip_pyramid(self.base_image_original)
+            self.metrics.inc("steamer_asset_loads_total", asset="line", source="decode")
+        if not self.line_vector:
+            line_size = self.base_image_original.size
+        
+        # COORDINATE SCALING Logic
+        # 1. Adapt to new image resolution (Reference: 4000x2110)
+        self.orig_w, self.orig_h = line_size
+        xref = float(self.line_ref_size[0])
+        
+        if self.orig_w != xref:
+            scale_factor = self.orig_w / xref
+            # Scale LINE points to match the loaded image resolution
+            for k in self.line_points:
+                px, py = self.line_points[k]
+                self.line_points[k] = (px * scale_factor, py * scale_factor)
+        
+        # 2. Layout space: Points and radii live in a 1600px reference frame.
+        # The pixels themselves are NOT downscaled - they are kept as a mip
+        # pyramid so HiDPI/4K displays resample from full resolution.
+        max_dim = 1600
+        w, h = line_size
+        if w > max_dim or h > max_dim:
+            ratio = min(max_dim/w, max_dim/h)
+            new_size = (int(w*ratio), int(h*ratio))
+            self.orig_w, self.orig_h = new_size
+            
+            # Apply downscale ratio to LINE points
+            for k in self.line_points:
+                px, py = self.line_points[k]
+                self.line_points[k] = (px * ratio, py * ratio)
+            
+            # Apply Separate Scaling for Render Points (Reference: 3840x2158)
+            # We need to map 3840x2158 space -> new_size (which matches Line Drawing aspect)
+            # This accounts for the slight stretch/squash applied to renders
+            xref_render = float(self.render_ref_size[0])
+            yref_render = float(self.render_ref_size[1])
+            
+            ratio_rx = new_size[0] / xref_render
+            ratio_ry = new_size[1] / yref_render
+            
+            for k in self.render_points:
+                px, py = self.render_points[k]
+                self.render_points[k] = (px * ratio_rx, py * ratio_ry)
+
+            self.line_radius *= ratio 
+            self.render_radius *= ratio_rx # Scale radius by Width ratio roughly
+            self.current_base_radius = self.line_radius
+        
+        # Set Active Points
+        self.original_points = self.line_points.copy()
+        
+        self.current_processed_image = self.scaled_line_drawing((self.orig_w, self.orig_h))
+        self.current_frame_source = self.current_processed_image
+        self.current_dirty_rects = []
+        
+        # Load additional renders now that we have the base path
+        self.load_renders()
+        self.cache_assets() # Re-cache with renders
+
+    def load_line_vector(self):
+        """The vector line drawing (from its path cache when current), or None to use the raster"""
+        try:
+            drawing = VectorDrawing.load(resource_path(PDF_FILE), resource_path(VECTOR_CACHE_FILE))
+        except Exception as e:
+            print(f"Warning: Vector line drawing unavailable, using {self.image_path}: {e}")
+            return None
+        self.metrics.inc("steamer_asset_loads_total", asset="line", source="vector")
+        return drawing
+
+    def scaled_line_drawing(self, size):
+        """The inverted line drawing at 'size': rasterised from the vector source or resampled"""
+        if self.line_vector:
+            return self.line_vector.rasterise(size)
+        return resize_from_pyramid(self.base_pyramid, size)
+
+    @classmethod
+    def headless(cls):
+        """Build a simulator with assets but no window, for offline frame rendering"""
+        self = cls.__new__(cls)
+        self.root = None
+        self.init_state()
+        self.cache_assets()
+        self.load_assets()
+        return self
+
+    @timed("steamer_load_renders_seconds")
     def load_renders(self):
         """Load the pre-rendered images for the realistic view mode"""
-        files = {
-            "alloff": "alloff.jpg",
-            "on": "on.jpg",
-            "onwithsteam": "onwithsteam.jpg",
-            "onwithboost": "onwithboost.jpg",
-            "onboostwithsteam": "onboostwithsteam.jpg"
-        }
+        deltas = self.asset_store.meta.get("render_deltas") if self.asset_store else None
+        if deltas:
+            # One base render plus small per-state patches (see render_delta.py)
+            self.render_base_pyramid = self.asset_store.get("render_base")
+            for key, patches in deltas["states"].items():
+                self.render_deltas[key] = [(tuple(box), tuple(inner), self.asset_store.get(f"render_patch/{key}/{i}"))
+                                           for i, (box, inner) in enumerate(patches)]
+            self.metrics.inc("steamer_asset_loads_total", len(deltas["states"]), asset="render", source="store_delta")
+            return
         
         try:
-            render_dir = os.path.join(os.path.dirname(self.image_path), "Renders")
-            if not os.path.exists(render_dir):
-                # Fallback if running from a different context
-                render_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Renders")
-
-            for key, filename in files.items():
-                path = os.path.join(render_dir, filename)
-                if os.path.exists(path):
+            for key in RENDER_FILES:
+                path = self.asset_sources["render/" + key]
+                if self.asset_store and "render/" + key in self.asset_store:
+                    # Zero-copy view of the shared mapping
+                    self.render_pyramids[key] = self.asset_store.get("render/" + key)
+                    self.render_images[key] = self.render_pyramids[key][0]
+                    self.metrics.inc("steamer_asset_loads_total", asset="render", source="store")
+                elif os.path.exists(path):
                     img = Image.open(path).convert("RGBA")
-                    # Initial scale to match base image if needed, or keep original?
-                    # The line drawing logic resizes the base image if it's too big. 
-                    # We should probably match the render size to the base image size for consistent coordinates.
-                    if hasattr(self, 'base_image_original'):
-                        target_size = self.base_image_original.size
-                        if img.size != target_size:
-                            img = img.resize(target_size, Image.Resampling.LANCZOS)
-                    
+                    # Keep native resolution. Renders are stretched onto the line
+                    # drawing's layout size when scaled, so coordinates stay consistent.
                     self.render_images[key] = img
+                    self.render_pyramids[key] = build_mip_pyramid(img)
+                    self.metrics.inc("steamer_asset_loads_total", asset="render", source="decode")
                 else:
                     print(f"Warning: Render file not found: {path}")
                     # Create a placeholder if missing
                     self.render_images[key] = Image.new("RGBA", (100, 100), (50, 50, 50))
+                    self.render_pyramids[key] = [self.render_images[key]]
+                    self.metrics.inc("steamer_asset_loads_total", asset="render", source="missing")
                     
         except Exception as e:
             print(f"Error loading renders: {e}")
@@ -348,21 +661,31 @@ class SteamerGUI:
         self.btn_view.pack(side="top")
 
     def toggle_view_mode(self):
-        self.use_renders = not self.use_renders
+        self.latency.begin("view")
+        self.apply_view_mode(not self.use_renders)
         if self.use_renders:
             self.btn_view.configure(text="SWITCH TO\nLINES")
             self.canvas.configure(bg="#000000") # Ensure black background
+        else:
+            self.btn_view.configure(text="SWITCH TO\nRENDERS")
+        
+        # Ensure styles are correct
+        self.refresh_ui()
+
+    def apply_view_mode(self, use_renders):
+        """Switch active points, radius and steam emitter (no Tk calls)"""
+        self.use_renders = use_renders
+        if use_renders:
             # Clean switch to render points
             self.original_points = self.render_points.copy()
             self.current_base_radius = self.render_radius
+            self.steam.set_emitter(*STEAM_EMITTERS["render"])
         else:
-            self.btn_view.configure(text="SWITCH TO\nRENDERS")
             # Switch back to line points
             self.original_points = self.line_points.copy()
             self.current_base_radius = self.line_radius
-        
-        # Ensure styles are correct
-        self.refresh_ui()
+            self.steam.set_emitter(*STEAM_EMITTERS["line"])
+        self.steam.reset()
 
     def create_control_group(self, parent, label_text, key_name, command, btn_text, is_hold_btn=False, btn_width=14):
         frame = tk.Frame(parent, bg="#2b2b2b")
@@ -390,6 +713,47 @@ class SteamerGUI:
             setattr(self, f"{key_name.lower()}_led", canvas_light)
 
     def refresh_ui(self):
+        """Invalidate the view. All requests before the next idle collapse into one render_frame."""
+        self.redraw_stats["requests"] += 1
+        self.metrics.inc("steamer_redraw_requests_total")
+        if self.governor and self.governor.sleeping:
+            self.governor.wake() # Rebuild scaled assets before composing
+        self.latency.mark("state")
+        if self.redraw_pending: return
+        self.redraw_pending = True
+        self.root.after_idle(self.render_frame)
+
+    @timed("steamer_frame_seconds")
+    def render_frame(self):
+        self.redraw_pending = False
+        self.redraw_stats["frames"] += 1
+        
+        self.compose_frame()
+        self.latency.mark("composite")
+        self.display_current_image()
+        self.latency.finish()
+        self.update_info_panel()
+        self.update_flowchart_hightlight()
+        if self.prefetcher:
+            self.prefetcher.schedule()
+
+    def frame_key(self):
+        """Everything a frame depends on, apart from steam particles and scale"""
+        pulse = round((self.pulse_intensity - 0.2) / 0.8 * (PULSE_STEPS - 1)) if self.is_heating else 0
+        target = self.target_mode if self.is_heating else 0
+        return (self.use_renders, self.power_on, self.mode, target, self.is_heating, pulse, self.hold_active)
+
+    def compose_frame(self):
+        """Build current_processed_image for the current state (no Tk calls)"""
+        # Particle frames are never cached - their steam differs every step
+        if self.frame_cache and not (self.steam_animating and not self.steam.exhausted):
+            frame = self.frame_cache.get(self.frame_key())
+            self.metrics.inc("steamer_frame_cache_total", result="miss" if frame is None else "hit")
+            if frame:
+                self.current_processed_image, self.current_frame_source, rects = frame
+                self.current_dirty_rects = list(rects)
+                return
+        
         if self.use_renders:
             # Render Mode: Select pre-rendered image based on state
             tag = "alloff"
@@ -419,6 +783,12 @@ class SteamerGUI:
             img = self.scaled_renders.get(tag, self.scaled_renders.get("alloff"))
             # Fallback to base line drawing if even 'alloff' is missing (e.g. load failed)
             if img:
+                 self.current_frame_source = img
+                 self.current_dirty_rects = []
+                 if self.steam_animating and not self.steam.exhausted:
+                     layers = self.steam_layers()
+                     self.current_dirty_rects = [r for r in (clip_layer(l, img.size) for l in layers) if r]
+                     img = composite_layers(img, layers)
                  self.current_processed_image = img
             else:
                  # Last resort fallback
@@ -426,10 +796,6 @@ class SteamerGUI:
         else:
             # Line Drawing Mode: Use dynamic lighting
             self.process_light_layer()
-            
-        self.display_current_image()
-        self.update_info_panel()
-        self.update_flowchart_hightlight()
 
     def update_info_panel(self):
         # Update LEDs
@@ -559,6 +925,7 @@ class SteamerGUI:
     # State Logic
     # -----------------
     def toggle_power(self):
+        self.latency.begin("power")
         if not self.power_on:
             # Turn ON -> Start Heat -> Normal
             self.power_on = True
@@ -569,11 +936,13 @@ class SteamerGUI:
             self.power_on = False
             self.mode = 1
             self.hold_active = False
+            self.steam.reset()
             self.cancel_heating()
         self.refresh_ui()
 
     def toggle_boost(self):
         if not self.power_on: return
+        self.latency.begin("boost")
         
         if self.mode == 1:
             # Switching TO Boost -> Start Heating
@@ -593,6 +962,7 @@ class SteamerGUI:
         # Use Time-Delta to prevent drift/lag
         self.heating_start_time = time.time()
         self.last_frame_time = self.heating_start_time
+        self.heating_steps = 0
         
         # Reduce target framerate to 30FPS for stability
         self.target_fps = 30
@@ -609,6 +979,14 @@ class SteamerGUI:
         now = time.time()
         elapsed = now - self.heating_start_time
         
+        if self.metrics.enabled:
+            # Achieved step rate (the loop targets target_fps but runs on the Tk timer)
+            self.metrics.observe("steamer_heating_step_interval_seconds", now - self.last_frame_time)
+            self.heating_steps += 1
+            if elapsed > 0:
+                self.metrics.set("steamer_heating_fps", self.heating_steps / elapsed)
+        self.last_frame_time = now
+        
         # Calculate progress (0.0 to 1.0)
         self.heating_progress = min(1.0, elapsed / self.real_duration)
         
@@ -641,72 +1019,15 @@ class SteamerGUI:
 
     def finish_heating(self):
         self.is_heating = False
+        self.mode = self.target_mode
         self.canvas.delete("overlay") # Clear overlay
         self.refresh_ui() # Ensures LED goes solid white
 
-    def update_heating_overlay(self):
-        self.canvas.delete("overlay")
-        # If holding steam, hide the heating overlay so we can see the steam
-        if self.hold_active: return
-        if not self.is_heating: return
-        
-        cw = self.canvas.winfo_width()
-        ch = self.canvas.winfo_height()
-        cx = cw // 2
-        
-        # Position at Top Center
-        y_top = 40
-        
-        # Dimensions
-        w, h = 300, 100
-        x1, y1 = cx - w//2, y_top
-        x2, y2 = cx + w//2, y_top + h
-        
-        # Background Box - Dark Grey with White Border
-        self.canvas.create_rectangle(x1, y1, x2, y2, fill="#2b2b2b", outline="#ffffff", width=2, tags="overlay")
-        
-        # Text "HEATING UP" - White
-        self.canvas.create_text(cx, y1 + 25, text="HEATING UP...", fill="#ffffff", font=("Segoe UI", 16, "bold"), tags="overlay")
-        
-        # Bar vars
-        # Display simulated time based on progress
-        remaining = max(0.0, 5.0 * (1.0 - self.heating_progress))
-        
-        bar_w = 250
-        bar_h = 12
-        bx1 = cx - bar_w//2
-        by1 = y1 + 55 # Shifted relative to box top
-        bx2 = cx + bar_w//2
-        by2 = by1 + bar_h
-        
-        # Bar Background - Darker
-        self.canvas.create_rectangle(bx1, by1, bx2, by2, fill="#444444", outline="", tags="overlay")
-        
-        # Bar Fill - White
-        fill_w = bar_w * self.heating_progress
-        if fill_w > 0:
-            self.canvas.create_rectangle(bx1, by1, bx1 + fill_w, by2, fill="#ffffff", outline="", tags="overlay")
-        
-        # Time Text - Grey
-        percent = int(self.heating_progress * 100)
-        self.canvas.create_text(cx, by2 + 20, text=f"{percent}%", fill="#aaaaaa", font=("Segoe UI", 12), tags="overlay")
-        
-        # Title text
-        title = "HEATING UP (BOOST)..." if self.target_mode == 2 else "HEATING UP..."
-        # Update text item
-        # self.canvas.itemconfigure... wait, I'm redrawing every frame or just updating? 
-        # I am deleting "overlay" tags every frame at start of update_heating_overlay?
-        # No, update_heating_overlay calls 'delete("overlay")' at start? No. 
-        # check_heating calls update_heating_overlay.
-        # Let's check update_heating_overlay implementation.
-        # It calls self.canvas.delete("overlay") at the top.
-        # So I just need to change the create_text call.
-    
     def update_heating_overlay(self):
         self.canvas.delete("overlay")
         # If holding steam, hide the heating overlay
         if self.hold_active: return
-        # if not self.is_heating: return # Logic handled in loop
+        if not self.is_heating: return
         
         cw = self.canvas.winfo_width()
         ch = self.canvas.winfo_height()
@@ -733,11 +1054,39 @@ class SteamerGUI:
         
         percent = int(self.heating_progress * 100)
         self.canvas.create_text(cx, by2 + 20, text=f"{percent}%", fill="#aaaaaa", font=("Segoe UI", 12), tags="overlay")
+
+    def start_hold(self):
         if not self.power_on: return
+        self.latency.begin("hold_press")
         self.hold_active = True
+        if not self.steam_animating and not self.static_steam:
+            self.steam.reset() # A new plume - retry animation if the last one ran out of budget
+            self.steam_animating = True
+            self.steam_last_time = time.time()
+            self.root.after(self.steam_step_delay, self.process_steam_step)
+        self.refresh_ui()
+
+    def process_steam_step(self):
+        now = time.time()
+        dt = now - self.steam_last_time
+        self.steam_last_time = now
+        
+        emitting = self.hold_active and self.power_on
+        self.steam.step(dt, boost=(self.mode == 2), emitting=emitting)
+        
+        if not emitting and self.steam.count == 0:
+            # Plume has faded out
+            self.steam_animating = False
+            self.refresh_ui()
+            return
+        
+        # Coalesces with the heating loop's redraw if both tick in the same frame
         self.refresh_ui()
+        self.root.after(self.steam_step_delay, self.process_steam_step)
 
     def stop_hold(self):
+        if self.hold_active:
+            self.latency.begin("hold_release")
         self.hold_active = False
         self.refresh_ui()
 
@@ -788,15 +1137,13 @@ class SteamerGUI:
         self.flow_canvas.itemconfig(f"text_{tag}", fill=text_col)
 
 
+    @timed("steamer_light_layer_seconds")
     def process_light_layer(self):
         if not hasattr(self, 'resized_base'): return
         
-        # Work on the resized buffer directly
-        working = self.resized_base.copy()
-        img_w, img_h = working.size
-        
-        # OPTIMIZATION: Removed full-screen accumulator. 
-        # Modifying 'working' image directly is faster.
+        # Collect the sprites to blend, then composite them onto a copy of resized_base
+        # in one pass
+        layers = [] # (sprite, x, y) screen-blended in order
 
         if self.power_on:
             # 1. Standard Lights
@@ -818,6 +1165,7 @@ class SteamerGUI:
                 active_lights.append(("Boost", b_intensity))
                 active_lights.append(("Boost_Side", b_intensity))
             
+            dimmed = {} # Lights of equal intensity share one dimmed sprite
             for name, intensity in active_lights:
                 if intensity < 0.05: continue
 
@@ -829,38 +1177,21 @@ class SteamerGUI:
                     
                     # Use SCALED sprite
                     sprite = self.scaled_glow
-                    sprite_w, sprite_h = sprite.size
-                    
-                    px = x - sprite_w // 2
-                    py = y - sprite_h // 2
-                    
-                    # Optimization: Only process intersection
-                    x1 = max(0, px)
-                    y1 = max(0, py)
-                    x2 = min(img_w, px + sprite_w)
-                    y2 = min(img_h, py + sprite_h)
-                    
-                    if x2 <= x1 or y2 <= y1: continue
-                    
-                    # Crop sprite
-                    spr_x = x1 - px
-                    spr_y = y1 - py
-                    visible_sprite = sprite.crop((spr_x, spr_y, spr_x + (x2 - x1), spr_y + (y2 - y1)))
                     
                     # Dimming
                     if intensity < 0.99:
-                        r, g, b, a = visible_sprite.split()
-                        a = a.point(lambda p: int(p * intensity))
-                        visible_sprite = Image.merge("RGBA", (r, g, b, a))
+                        if intensity not in dimmed:
+                            r, g, b, a = sprite.split()
+                            a = a.point(lambda p: int(p * intensity))
+                            dimmed[intensity] = Image.merge("RGBA", (r, g, b, a))
+                        sprite = dimmed[intensity]
 
-                    # Blend Local Region
-                    dest_region = working.crop((x1, y1, x2, y2))
-                    # Use screen blend for lights
-                    blended = ImageChops.screen(dest_region, visible_sprite)
-                    working.paste(blended, (x1, y1))
+                    layers.append((sprite, x - sprite.width // 2, y - sprite.height // 2))
 
-            # 2. Steam Lines (Cached & Optimized)
-            if self.hold_active:
+            # 2. Steam: animated particles, or the static sprite if they can't keep to budget
+            if self.steam_animating and not self.steam.exhausted:
+                layers.extend(self.steam_layers())
+            elif self.hold_active:
                 rx, ry = self.original_points.get("Steam", (0,0))
                 # Ensure integer coordinates
                 sx = int(rx * self.current_scale)
@@ -870,28 +1201,24 @@ class SteamerGUI:
                     # Select Sprite
                     kind = "boost" if self.mode == 2 else "normal"
                     sprite = self.scaled_steam_sprites[kind]
-                    
-                    sprite_w, sprite_h = sprite.size
-                    px = sx - sprite_w // 2
-                    py = sy - sprite_h // 2
-                    
-                    x1 = max(0, px)
-                    y1 = max(0, py)
-                    x2 = min(img_w, px + sprite_w)
-                    y2 = min(img_h, py + sprite_h)
-
-                    if x2 > x1 and y2 > y1:
-                        spr_x = x1 - px
-                        spr_y = y1 - py
-                        visible_steam = sprite.crop((spr_x, spr_y, spr_x + (x2 - x1), spr_y + (y2 - y1)))
-                        
-                        dest_region = working.crop((x1, y1, x2, y2))
-                        # Use screen blend (lighter) to add light to the base
-                        blended = ImageChops.screen(dest_region, visible_steam)
-                        working.paste(blended, (x1, y1))
-
-        # No final composite needed - 'working' is updated directly
-        self.current_processed_image = working
+                    layers.append((sprite, sx - sprite.width // 2, sy - sprite.height // 2))
+
+        # Nothing lit: the frame is the base itself, like an unchanged render in render view
+        self.current_processed_image = (composite_layers(self.resized_base, layers)
+                                        if layers else self.resized_base)
+        self.current_frame_source = self.resized_base
+        # Regions that differ from resized_base
+        self.current_dirty_rects = [r for r in (clip_layer(l, self.resized_base.size) for l in layers) if r]
+
+    def steam_layers(self):
+        """The particle plume as a [(layer, x, y)] list (empty if nothing to draw)"""
+        if "Steam" not in self.original_points: return []
+        rx, ry = self.original_points["Steam"]
+        
+        result = self.steam.render(self.current_scale, boost=(self.mode == 2))
+        if result is None: return []
+        layer, (dx, dy) = result
+        return [(layer, int(rx * self.current_scale) + dx, int(ry * self.current_scale) + dy)]
 
     def on_resize(self, event):
         # Avoid excessive updates
@@ -900,54 +1227,160 @@ class SteamerGUI:
             if w > 10 and h > 10:
                 scale_w = w / self.orig_w
                 scale_h = h / self.orig_h
-                new_scale = min(scale_w, scale_h) * 0.9
+                fit_scale = min(scale_w, scale_h) * 0.9
                 
-                # Check if scale changed significantly (optimization)
-                if abs(new_scale - self.current_scale) > 0.01 or not hasattr(self, 'resized_base'):
+                # Snapped to a bucket. The current bucket is kept while it fits and is at
+                # most one bucket too small, so size jitter at a bucket edge never rescales.
+                new_scale = self.current_scale
+                if not (self.current_scale <= fit_scale < self.current_scale * SCALE_BUCKET_RATIO ** 2):
+                    new_scale = snap_scale(fit_scale)
+                
+                if self.governor and self.governor.sleeping:
+                    # Rescale on wake; just keep the picture centred
+                    self.current_scale = new_scale
+                    self.canvas.coords(self.image_id, w // 2, h // 2)
+                    return
+                
+                if new_scale != self.current_scale or not hasattr(self, 'resized_base'):
                     self.current_scale = new_scale
                     self.cache_scaled_assets()
                     self.refresh_ui()
+                else:
+                    self.metrics.inc("steamer_scaled_cache_total", result="unchanged")
 
     def cache_scaled_assets(self):
+        """Activate the scaled asset set for current_scale - from the LRU, or built"""
+        if self.frame_cache:
+            self.frame_cache = {} # Composited at the old scale
+        
+        entry = self.scaled_sets.pop(self.current_scale, None)
+        if entry is None:
+            assets = self.build_scaled_assets()
+            if assets is None: return
+            entry = (assets, image_nbytes(assets))
+            self.metrics.inc("steamer_scaled_cache_total", result="rebuild")
+        else:
+            self.metrics.inc("steamer_scaled_cache_total", result="hit")
+        self.scaled_sets[self.current_scale] = entry # Most recently used last
+        
+        # Evict least recently used sets over the budget (the active set always stays)
+        total = sum(nbytes for _, nbytes in self.scaled_sets.values())
+        while len(self.scaled_sets) > 1 and total > self.scaled_cache_budget:
+            _, (_, nbytes) = self.scaled_sets.popitem(last=False)
+            total -= nbytes
+        
+        for name, value in entry[0].items():
+            setattr(self, name, value)
+        
+        if self.metrics.enabled:
+            for name, obj in self.memory_categories():
+                self.metrics.set("steamer_asset_bytes", image_nbytes(obj), category=name)
+
+    @timed("steamer_rescale_seconds")
+    def build_scaled_assets(self):
+        """Resample every scaled asset for current_scale -> {attribute: value}, or None"""
         # 1. Base Image
         new_w = int(self.orig_w * self.current_scale)
         new_h = int(self.orig_h * self.current_scale)
-        if new_w <= 0 or new_h <= 0: return
-        self.resized_base = self.base_image_original.resize((new_w, new_h), Image.Resampling.BILINEAR)
+        if new_w <= 0 or new_h <= 0: return None
+        # Rasterised at this size, or resampled from the nearest mip level above the
+        # target (sharp on HiDPI, cheap when small)
+        resized_base = self.scaled_line_drawing((new_w, new_h))
         
         # 2. Glow Sprite
         gw, gh = self.glow_sprite.size
-        self.scaled_glow = self.glow_sprite.resize((int(gw * self.current_scale), int(gh * self.current_scale)), Image.Resampling.BILINEAR)
+        scaled_glow = self.glow_sprite.resize((int(gw * self.current_scale), int(gh * self.current_scale)), Image.Resampling.BILINEAR)
         
         # 3. Steam Sprites
-        self.scaled_steam_sprites = {}
+        scaled_steam_sprites = {}
         for k, v in self.steam_sprites.items():
             sw, sh = v.size
-            self.scaled_steam_sprites[k] = v.resize((int(sw * self.current_scale), int(sh * self.current_scale)), Image.Resampling.BILINEAR)
+            scaled_steam_sprites[k] = v.resize((int(sw * self.current_scale), int(sh * self.current_scale)), Image.Resampling.BILINEAR)
 
         # 4. Renders
+        # Stretched onto the base image size so render points line up
+        scaled_renders = {}
+        if self.render_base_pyramid:
+            # Resize the shared base once, then resample only each state's patches onto it
+            level = pick_mip_level(self.render_base_pyramid, (new_w, new_h))
+            scaled_base = resize_from_pyramid(self.render_base_pyramid, (new_w, new_h))
+            level_size = self.render_base_pyramid[level].size
+            for k, patches in self.render_deltas.items():
+                scaled_renders[k] = apply_render_delta(scaled_base, level_size, level, patches)
+        for k, levels in self.render_pyramids.items():
+             scaled_renders[k] = resize_from_pyramid(levels, (new_w, new_h))
+        
+        return {"resized_base": resized_base, "scaled_glow": scaled_glow,
+                "scaled_steam_sprites": scaled_steam_sprites, "scaled_renders": scaled_renders}
+
+    def release_scaled_assets(self):
+        """Drop everything cache_scaled_assets and compose_frame rebuild (idle sleep).
+        The Tk photo is kept - it is what the canvas repaints from."""
+        for name in ("resized_base", "scaled_glow", "current_processed_image", "current_frame_source"):
+            self.__dict__.pop(name, None) # hasattr() checks treat these as not built yet
+        self.scaled_steam_sprites = {}
         self.scaled_renders = {}
-        for k, v in self.render_images.items():
-             new_w = int(v.width * self.current_scale)
-             new_h = int(v.height * self.current_scale)
-             self.scaled_renders[k] = v.resize((new_w, new_h), Image.Resampling.BILINEAR)
+        self.scaled_sets.clear()
+        self.frame_cache = None
+        self.current_dirty_rects = []
+        self.displayed_source = None
+        self.displayed_rects = []
+        self.tk_staging = None
+        self.steam.reset()
+        if self.asset_store:
+            self.asset_store.release_pages()
 
     def display_current_image(self):
         # Just display the pre-rendered image (no resizing here)
         if not hasattr(self, 'current_processed_image'): return
         
-        self.tk_image = ImageTk.PhotoImage(self.current_processed_image)
+        t0 = time.perf_counter()
+        frame = self.current_processed_image
+        w, h = frame.size
+        
+        if (not self.incremental_upload or self.tk_image is None or self.tk_staging is None
+                or (self.tk_image.width(), self.tk_image.height()) != (w, h)):
+            # Scale changed (or A/B legacy mode): allocate fresh photos
+            self.tk_image = ImageTk.PhotoImage(frame)
+            self.tk_staging = ImageTk.PhotoImage("RGBA", (w, h)) if self.incremental_upload else None
+            self.canvas.itemconfigure(self.image_id, image=self.tk_image)
+            pixels = w * h
+        elif self.current_frame_source is not self.displayed_source:
+            # Different underlying image (view switch, render swap, rescale): full in-place paste
+            self.tk_image.paste(frame)
+            pixels = w * h
+        else:
+            # Same base: only the regions touched by this frame or the previous one differ
+            pixels = 0
+            for x1, y1, x2, y2 in self.displayed_rects + self.current_dirty_rects:
+                rw, rh = x2 - x1, y2 - y1
+                self.tk_staging.paste(frame.crop((x1, y1, x2, y2)))
+                # "set" replaces the pixels - Tk's default (overlay) would blend the mostly
+                # translucent line-view pixels over the old ones and leave glows burned in
+                self.root.tk.call(str(self.tk_image), "copy", str(self.tk_staging),
+                                  "-from", 0, 0, rw, rh, "-to", x1, y1, "-compositingrule", "set")
+                pixels += rw * rh
+        
+        self.displayed_source = self.current_frame_source
+        self.displayed_rects = self.current_dirty_rects
+        
+        stats = self.upload_stats
+        stats["frames"] += 1
+        stats["pixels"] += pixels
+        stats["seconds"] += time.perf_counter() - t0
         
         cw = self.canvas.winfo_width()
         ch = self.canvas.winfo_height()
         #self.canvas.config(width=cw, height=ch) # Don't reconfig - loop danger
-        self.canvas.itemconfigure(self.image_id, image=self.tk_image)
         self.canvas.coords(self.image_id, cw//2, ch//2)
         
         # Ensure overlay is on top after image update
         self.update_heating_overlay()
 
     def on_canvas_click(self, event):
+        if self.attract and self.attract.interrupt():
+            return # The click that ends the demo does not press a button
+        self.latency.stamp_input()
         x = event.x
         y = event.y
         # Convert to original coordinates to check hit zones
@@ -973,9 +1406,92 @@ class SteamerGUI:
             self.toggle_boost()
         elif btn_name == "Hold" or btn_name == "Hold_Side":
             self.start_hold()
+        self.latency.drop_input()
 
     def on_canvas_release(self, event):
+        self.latency.stamp_input()
         self.stop_hold()
+        self.latency.drop_input()
+
+    def on_close(self):
+        self.report_memory()
+        self.report_latency()
+        if self.metrics_exporter:
+            self.metrics_exporter.close()
+        self.root.destroy()
+
+    def report_latency(self):
+        """Print the latency histograms; append them to STEAMER_LATENCY_LOG (JSON lines) if set"""
+        print(self.latency.report())
+        log_path = os.environ.get("STEAMER_LATENCY_LOG")
+        if log_path:
+            self.latency.export(log_path)
+
+    def memory_categories(self):
+        """(name, image/container) pairs for the memory report and metrics"""
+        return [
+            ("base_image_original", getattr(self, 'base_pyramid', None)),
+            ("line_vector", self.line_vector),
+            ("resized_base", getattr(self, 'resized_base', None)),
+            ("render_images", [self.render_pyramids, self.render_base_pyramid, self.render_deltas]),
+            ("scaled_renders", self.scaled_renders),
+            # Inactive sets only - the active one is counted above
+            ("scaled_set_cache", [assets for assets, _ in self.scaled_sets.values()
+                                  if assets.get("resized_base") is not getattr(self, 'resized_base', None)]),
+            ("glow_sprite", [getattr(self, 'glow_sprite', None), getattr(self, 'scaled_glow', None)]),
+            ("steam_sprites", [getattr(self, 'steam_sprites', None), getattr(self, 'scaled_steam_sprites', None)]),
+            ("frame", getattr(self, 'current_processed_image', None)),
+            # Render-view frames are the scaled renders themselves - count only composited ones,
+            # once each (prefetched keys may share a frame)
+            ("frame_cache", list({id(f[0]): f[0] for f in (self.frame_cache or {}).values()
+                                  if f[0] is not f[1]}.values())),
+            ("frame_photoimage", [getattr(self, 'tk_image', None), getattr(self, 'tk_staging', None)]),
+        ]
+
+    def report_memory(self, top_n=10):
+        """Print asset memory per category, live PhotoImages and a tracemalloc diff"""
+        lines = ["", "=== Steamer Memory Report ==="]
+        total = 0
+        for name, obj in self.memory_categories():
+            nbytes = image_nbytes(obj)
+            total += nbytes
+            lines.append(f"  {name:<22}{nbytes / 1048576:>9.1f} MB")
+        lines.append(f"  {'TOTAL':<22}{total / 1048576:>9.1f} MB")
+        if getattr(self, 'asset_store', None):
+            lines.append(f"  (base + renders mapped from {self.asset_store.path}: "
+                         f"{self.asset_store.nbytes / 1048576:.1f} MB shared page cache)")
+        
+        # Live PhotoImages - Python wrappers vs images still registered in Tcl
+        photo_count = sum(1 for o in gc.get_objects() if isinstance(o, ImageTk.PhotoImage))
+        try:
+            tcl_count = len(self.root.tk.splitlist(self.root.tk.call("image", "names")))
+        except Exception:
+            tcl_count = -1
+        lines.append(f"  PhotoImage objects: {photo_count} (Tcl images: {tcl_count})")
+        
+        redraw = self.redraw_stats
+        lines.append(f"  Redraws: {redraw['requests']} requested, {redraw['frames']} composited")
+        
+        stats = getattr(self, 'upload_stats', None)
+        if stats and stats["frames"]:
+            mode = "incremental" if self.incremental_upload else "full"
+            lines.append(f"  Frame upload ({mode}): {stats['frames']} frames, "
+                         f"{stats['seconds'] * 1000 / stats['frames']:.2f} ms avg, "
+                         f"{stats['pixels'] // stats['frames']} px avg")
+        
+        # Tracemalloc: diff against the previous report (first press starts tracing)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        if self.memory_snapshot is None:
+            lines.append("  tracemalloc: baseline taken, report again for a diff")
+        else:
+            lines.append(f"  tracemalloc top {top_n} since last report:")
+            for stat in snapshot.compare_to(self.memory_snapshot, "lineno")[:top_n]:
+                lines.append(f"    {stat}")
+        self.memory_snapshot = snapshot
+        
+        print("\n".join(lines))
 
     def get_clicked_button_name(self, x, y):
         radius = self.current_base_radius * 1.5 # slightly larger hit area
@@ -0,0 +1,108 @@
+import bisect
+import json
+import time
+from collections import deque
+
+# Input-to-photon latency tracing.
+#
+# Every user input opens a trace when its handler runs. Stages are then stamped as the
+# interaction moves through the pipeline:
+#   state     - state changed and a redraw was requested (refresh_ui)
+#   composite - frame composited (compose_frame)
+#   upload    - pixels handed to the canvas (display_current_image) -> trace complete
+# Several inputs coalesced into one frame all complete on that frame. Latencies are
+# kept per event type as a histogram plus a bounded sample window for percentiles.
+
+STAGES = ("state", "composite", "upload")
+BUCKETS_MS = [1, 2, 4, 8, 16, 33, 50, 100, 200, 500] # Upper edges; last bucket is open
+MAX_SAMPLES = 2000 # Per event type, for percentiles
+
+
+class LatencyTracer:
+    def __init__(self):
+        self.pending = []
+        self.input_time = None
+        self.histograms = {} # type -> bucket counts
+        self.samples = {} # type -> deque of (total, state, composite, upload) in ms
+        self.paused = False # Ignore interactions (e.g. the attract-mode demo)
+
+    def stamp_input(self):
+        """Record arrival of a raw input event; the next begin() starts from here"""
+        self.input_time = time.perf_counter()
+
+    def drop_input(self):
+        """The input did not trigger an interaction"""
+        self.input_time = None
+
+    def begin(self, event_type):
+        if self.paused:
+            self.input_time = None
+            return
+        t0 = self.input_time if self.input_time is not None else time.perf_counter()
+        self.input_time = None
+        self.pending.append({"type": event_type, "t0": t0})
+
+    def mark(self, stage):
+        if not self.pending:
+            return
+        now = time.perf_counter()
+        for trace in self.pending:
+            trace.setdefault(stage, now)
+
+    def finish(self):
+        """The frame reached the canvas: close every pending trace"""
+        if not self.pending:
+            return
+        now = time.perf_counter()
+        for trace in self.pending:
+            t0 = trace["t0"]
+            total = (now - t0) * 1000.0
+            stages = [(trace.get(s, now) - t0) * 1000.0 for s in STAGES[:-1]]
+            kind = trace["type"]
+            hist = self.histograms.setdefault(kind, [0] * (len(BUCKETS_MS) + 1))
+            hist[bisect.bisect_left(BUCKETS_MS, total)] += 1
+            self.samples.setdefault(kind, deque(maxlen=MAX_SAMPLES)).append((total, *stages, total))
+        self.pending = []
+
+    def summary(self):
+        """Per event type: count, percentiles, mean stage times and histogram"""
+        out = {}
+        for kind, samples in self.samples.items():
+            totals = sorted(s[0] for s in samples)
+            n = len(totals)
+
+            def pct(p):
+                return totals[min(n - 1, int(p * n))]
+
+            out[kind] = {
+                "count": sum(self.histograms[kind]),
+                "p50_ms": round(pct(0.50), 2),
+                "p95_ms": round(pct(0.95), 2),
+                "max_ms": round(totals[-1], 2),
+                "stage_mean_ms": {stage: round(sum(s[i + 1] for s in samples) / n, 2)
+                                  for i, stage in enumerate(STAGES)},
+                "histogram": dict(zip([f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"],
+                                      self.histograms[kind])),
+            }
+        return out
+
+    def report(self):
+        lines = ["", "=== Input Latency (input -> canvas) ==="]
+        summary = self.summary()
+        if not summary:
+            lines.append("  No interactions traced yet")
+        for kind, s in sorted(summary.items()):
+            st = s["stage_mean_ms"]
+            lines.append(f"  {kind:<13} n={s['count']:<5} p50={s['p50_ms']:.1f}ms  p95={s['p95_ms']:.1f}ms  "
+                         f"max={s['max_ms']:.1f}ms  (state {st['state']:.1f} / composite {st['composite']:.1f} "
+                         f"/ upload {st['upload']:.1f})")
+            peak = max(s["histogram"].values()) or 1
+            for label, count in s["histogram"].items():
+                if count:
+                    lines.append(f"      {label:>8} {'#' * max(1, round(30 * count / peak))} {count}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        """Append one JSON line (timestamp + summary) for trend tracking"""
+        with open(path, "a") as f:
+            f.write(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "latency": self.summary()}) + "\n")
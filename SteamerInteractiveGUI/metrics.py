@@ -0,0 +1,183 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Opt-in metrics in Prometheus text format, for monitoring kiosk fleets.
+#
+#   STEAMER_METRICS_PORT=9464        serve http://127.0.0.1:9464/metrics
+#   STEAMER_METRICS_FILE=/path.prom  rewrite the file every STEAMER_METRICS_INTERVAL
+#                                    seconds (default 15), e.g. for node_exporter's
+#                                    textfile collector
+#
+# With neither set the registry is disabled: every update returns after one attribute
+# check and the @timed wrapper does not even read the clock.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5) # Seconds
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock() # Updates come from the Tk thread, scrapes from the server thread
+        self.families = {} # name -> {"type", "help", "buckets", "series": {labels tuple: value}}
+
+    def declare(self, name, kind, help_text, buckets=DEFAULT_BUCKETS):
+        """Register a 'counter', 'gauge' or 'histogram' (histogram buckets in seconds)"""
+        self.families[name] = {"type": kind, "help": help_text, "buckets": tuple(buckets), "series": {}}
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.families[name]["series"]
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.families[name]["series"][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            family = self.families[name]
+            hist = family["series"].get(key)
+            if hist is None:
+                # Per-bucket (non-cumulative) counts + overflow, sum, count
+                hist = family["series"][key] = [[0] * (len(family["buckets"]) + 1), 0.0, 0]
+            hist[0][bisect.bisect_left(family["buckets"], value)] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def render(self):
+        """Exposition text for every declared family"""
+        lines = []
+        with self.lock:
+            for name, family in self.families.items():
+                lines.append(f"# HELP {name} {family['help']}")
+                lines.append(f"# TYPE {name} {family['type']}")
+                for key, value in family["series"].items():
+                    if family["type"] != "histogram":
+                        lines.append(f"{name}{_labels(key)} {_number(value)}")
+                        continue
+                    counts, total, count = value
+                    cumulative = 0
+                    for edge, n in zip(family["buckets"] + (float("inf"),), counts):
+                        cumulative += n
+                        le = "+Inf" if edge == float("inf") else _number(edge)
+                        lines.append(f"{name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(total)}")
+                    lines.append(f"{name}_count{_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Write the exposition atomically (readers never see a partial file)"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+def _labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def timed(name):
+    """Method decorator: observe the call's duration in histogram 'name' of self.metrics"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            if not metrics.enabled:
+                return method(self, *args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - t0)
+        return wrapper
+    return decorate
+
+
+def metrics_enabled():
+    return bool(os.environ.get("STEAMER_METRICS_PORT") or os.environ.get("STEAMER_METRICS_FILE"))
+
+
+class MetricsExporter:
+    """Serves and/or periodically writes a registry, as configured by the environment"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.server = None
+        self.stop_event = threading.Event()
+        self.file_path = os.environ.get("STEAMER_METRICS_FILE")
+
+        port = os.environ.get("STEAMER_METRICS_PORT")
+        if port:
+            handler = type("Handler", (_MetricsHandler,), {"metrics": metrics})
+            try:
+                # Loopback only - a kiosk should not expose a port to the network by default
+                self.server = ThreadingHTTPServer(("127.0.0.1", int(port)), handler)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Metrics server not started on port {port}: {e}")
+            else:
+                threading.Thread(target=self.server.serve_forever, daemon=True, name="metrics-http").start()
+
+        if self.file_path:
+            interval = float(os.environ.get("STEAMER_METRICS_INTERVAL", "15"))
+            threading.Thread(target=self._write_loop, args=(interval,), daemon=True, name="metrics-file").start()
+
+    def _write_loop(self, interval):
+        while not self.stop_event.wait(interval):
+            self._write()
+
+    def _write(self):
+        try:
+            self.metrics.write_file(self.file_path)
+        except OSError as e:
+            print(f"Warning: Could not write metrics file {self.file_path}: {e}")
+
+    def close(self):
+        """Stop serving; flush a final file so the last values survive shutdown"""
+        self.stop_event.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.file_path:
+            self._write()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Scrapes every few seconds would flood the console
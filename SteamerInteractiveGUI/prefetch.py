@@ -0,0 +1,149 @@
+import os
+
+# Predictive prefetch of the frames one input away.
+#
+# The state transitions are all known, so after every displayed frame the prefetcher
+# lists the states the next input can lead to and composites their first frames at
+# the current scale into gui.frame_cache, one per idle callback. Frames the new state
+# can no longer reach are dropped, so the cache only ever holds a handful of frames.
+# A click then finds its first frame ready (compose_frame checks the cache first) and
+# only has to upload it.
+#
+# Transitions, as implemented by SteamerGUI:
+#   toggle_view_mode   the same state in the other view
+#   toggle_power       off -> heating to normal; on -> off (normal, hold released)
+#   toggle_boost       normal -> heating to boost; boost -> normal, heating cancelled
+#   finish_heating     heating -> steady in the target mode
+#   start/stop_hold    only with static steam - particle frames cannot be cached
+# The view and hold toggles are not prefetched during a heat-up: they keep its pulse, and
+# a frame keyed by one pulse level is stale within a fraction of a second.
+# A heat-up's first frame is drawn at pulse 0.6 (sin(0) in process_heating_step). That
+# is the edge between two pulse levels and the clock decides which side the first step
+# lands on, so the frame is composited at 0.6 under both levels' keys.
+#
+# Nothing is prefetched while attract mode owns the cache, while the idle governor
+# sleeps or while steam particles are animating.
+#
+#   STEAMER_PREFETCH=0   turn prefetching off
+
+FIRST_HEATING_PULSE = 0.6
+# Either side of a level edge; both map to one key when 0.6 is not on an edge
+FIRST_HEATING_PULSES = (FIRST_HEATING_PULSE - 1e-6, FIRST_HEATING_PULSE + 1e-6)
+
+
+def prefetch_enabled():
+    return os.environ.get("STEAMER_PREFETCH", "1") != "0"
+
+
+def next_states(state, static_steam=False):
+    """States one input away from 'state' = (use_renders, power, mode, target, heating, hold, pulse)"""
+    view, power, mode, target, heating, hold, pulse = state
+
+    def heat_up(target_mode):
+        return [(view, True, mode, target_mode, True, hold, pulse) for pulse in FIRST_HEATING_PULSES]
+
+    # No view (or hold) toggle while heating - see above
+    states = [] if heating else [(not view, power, mode, target, heating, hold, pulse)]
+    if not power:
+        return states + heat_up(1)
+    states.append((view, False, 1, target, False, False, pulse))
+    if mode == 1:
+        states += heat_up(2)
+    else:
+        states.append((view, True, 1, target, False, hold, pulse))
+    if heating:
+        states.append((view, True, target, target, False, hold, pulse))
+    elif static_steam:
+        states.append((view, True, mode, target, heating, not hold, pulse))
+    return states
+
+
+class Prefetcher:
+    def __init__(self, gui):
+        self.gui = gui
+        self.job = None
+        self.pending = None
+
+    def capture(self):
+        gui = self.gui
+        return (gui.use_renders, gui.power_on, gui.mode, gui.target_mode, gui.is_heating,
+                gui.hold_active, gui.pulse_intensity)
+
+    def apply(self, state):
+        gui = self.gui
+        if state[0] != gui.use_renders:
+            gui.apply_view_mode(state[0])
+        (_, gui.power_on, gui.mode, gui.target_mode, gui.is_heating,
+         gui.hold_active, gui.pulse_intensity) = state
+
+    def schedule(self):
+        """Re-plan for the state just displayed (called after every frame)"""
+        gui = self.gui
+        if self.job:
+            gui.root.after_cancel(self.job)
+            self.job = None
+        self.pending = None
+        if self.ready():
+            self.pending = self.prefetch_frames()
+            self.job = gui.root.after_idle(self.step)
+
+    def ready(self):
+        gui = self.gui
+        if gui.attract and gui.attract.active:
+            return False
+        if gui.governor and gui.governor.sleeping:
+            return False
+        return not gui.steam_animating and hasattr(gui, 'resized_base')
+
+    def step(self):
+        self.job = None
+        if not self.ready():
+            self.pending = None # Re-planned after the next frame
+        elif self.pending and next(self.pending, None) is not None:
+            self.job = self.gui.root.after_idle(self.step)
+
+    def prefetch_frames(self):
+        """Generator: prune the cache to the next states, then composite one missing frame per call"""
+        gui = self.gui
+        current = self.capture()
+        targets = {}
+        try:
+            for state in next_states(current, gui.static_steam):
+                if state[:6] == current[:6]:
+                    continue # Restarting this heat-up: a cached frame would quantise its pulse
+                # frame_key() only reads attributes - no view switch needed
+                (gui.use_renders, gui.power_on, gui.mode, gui.target_mode, gui.is_heating,
+                 gui.hold_active, gui.pulse_intensity) = state
+                targets.setdefault(gui.frame_key(), state)
+        finally:
+            (gui.use_renders, gui.power_on, gui.mode, gui.target_mode, gui.is_heating,
+             gui.hold_active, gui.pulse_intensity) = current
+        gui.frame_cache = {k: v for k, v in (gui.frame_cache or {}).items() if k in targets}
+
+        composited = {} # Keys either side of a pulse edge share one frame
+        for key, state in targets.items():
+            if key in gui.frame_cache:
+                continue
+            look = state[:6] + (round(state[6], 3),)
+            if look in composited:
+                gui.frame_cache[key] = composited[look]
+                continue
+            composited[look] = self.composite(key, state)
+            yield key
+
+    def composite(self, key, state):
+        gui = self.gui
+        saved = self.capture()
+        shown = (gui.current_processed_image, gui.current_frame_source, gui.current_dirty_rects)
+        cache, gui.frame_cache = gui.frame_cache, None # Composite for real, not a cache lookup
+        try:
+            self.apply(state)
+            gui.compose_frame()
+            frame = cache[key] = (gui.current_processed_image, gui.current_frame_source,
+                                  list(gui.current_dirty_rects))
+            gui.metrics.inc("steamer_prefetched_frames_total")
+        finally:
+            gui.frame_cache = cache
+            self.apply(saved)
+            gui.current_processed_image, gui.current_frame_source, gui.current_dirty_rects = shown
+        return frame
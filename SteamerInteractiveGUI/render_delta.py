@@ -0,0 +1,126 @@
+import math
+
+import numpy as np
+from PIL import Image
+
+# Delta encoding of the render states.
+#
+# The five renders share one camera and differ only around the LEDs and the steam
+# plume (plus JPEG noise). They are stored as one base render and, per state, a few
+# rectangular patches cut from that state. Patches are aligned to TILE pixels, so
+# their mip levels line up exactly with the base pyramid (box-filter reduce of an
+# aligned region == that region of the reduced image). Each patch also carries MARGIN
+# pixels of context. A scaled state is rebuilt by resizing only the patches onto the
+# scaled base, using resize(box=...) so the filter sees that context and the
+# result matches a full-frame resize.
+
+TILE = 64 # Alignment and change-detection granularity (full-res pixels)
+BLOCK = 8 # Differences are averaged over BLOCKxBLOCK before thresholding (ignores JPEG noise)
+THRESHOLD = 10 # Mean channel difference that marks a block as changed
+MARGIN = 2 * TILE # Resampling context kept around each changed region
+
+
+def changed_tiles(img, base):
+    """Boolean tile grid: True where 'img' visibly differs from 'base'"""
+    a = np.asarray(img.convert("RGB"), dtype=np.int16)
+    b = np.asarray(base.convert("RGB"), dtype=np.int16)
+    d = np.abs(a - b).max(axis=2).astype(np.float32)
+    H, W = d.shape
+    d = np.pad(d, ((0, -H % TILE), (0, -W % TILE)))
+    H2, W2 = d.shape
+    blocks = d.reshape(H2 // BLOCK, BLOCK, W2 // BLOCK, BLOCK).mean(axis=(1, 3))
+    tiles = blocks.reshape(H2 // TILE, TILE // BLOCK, W2 // TILE, TILE // BLOCK).max(axis=(1, 3)) > THRESHOLD
+
+    # Dilate by one tile so soft fringes (steam wisps) below the threshold are kept
+    grown = tiles.copy()
+    grown[1:] |= tiles[:-1]
+    grown[:-1] |= tiles[1:]
+    grown[:, 1:] |= grown[:, :-1].copy()
+    grown[:, :-1] |= grown[:, 1:].copy()
+    return grown
+
+
+def tile_regions(tiles):
+    """Bounding boxes (in tiles) of the 8-connected components of a tile grid"""
+    seen = np.zeros_like(tiles)
+    regions = []
+    rows, cols = tiles.shape
+    for r0, c0 in zip(*np.nonzero(tiles)):
+        if seen[r0, c0]:
+            continue
+        stack = [(r0, c0)]
+        seen[r0, c0] = True
+        r_min = r_max = r0
+        c_min = c_max = c0
+        while stack:
+            r, c = stack.pop()
+            r_min, r_max = min(r_min, r), max(r_max, r)
+            c_min, c_max = min(c_min, c), max(c_max, c)
+            for rr in range(max(0, r - 1), min(rows, r + 2)):
+                for cc in range(max(0, c - 1), min(cols, c + 2)):
+                    if tiles[rr, cc] and not seen[rr, cc]:
+                        seen[rr, cc] = True
+                        stack.append((rr, cc))
+        regions.append((int(c_min), int(r_min), int(c_max) + 1, int(r_max) + 1))
+    return regions
+
+
+def encode_state(img, base):
+    """-> [(box, inner)] in full-res pixels. 'inner' is the changed area, 'box' adds MARGIN."""
+    W, H = img.size
+    patches = []
+    for c0, r0, c1, r1 in tile_regions(changed_tiles(img, base)):
+        inner = (c0 * TILE, r0 * TILE, min(W, c1 * TILE), min(H, r1 * TILE))
+        box = (max(0, inner[0] - MARGIN), max(0, inner[1] - MARGIN),
+               min(W, inner[2] + MARGIN), min(H, inner[3] + MARGIN))
+        patches.append((box, inner))
+    return patches
+
+
+def encode_render_deltas(images):
+    """
+    Pick the base that needs the least patch area and encode every other state against it.
+    -> (base key, {key: [(box, inner)]}). The base maps to an empty list.
+    """
+    best = None
+    for base_key, base in images.items():
+        deltas = {key: ([] if key == base_key else encode_state(img, base)) for key, img in images.items()}
+        area = sum((b[2] - b[0]) * (b[3] - b[1]) for patches in deltas.values() for b, _ in patches)
+        if best is None or area < best[0]:
+            best = (area, base_key, deltas)
+    return best[1], best[2]
+
+
+def patch_levels(patch, count):
+    """Mip levels of a patch matching the first 'count' levels of the base pyramid"""
+    levels = [patch]
+    while len(levels) < count:
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+
+def apply_render_delta(scaled_base, level_size, level, patches):
+    """
+    Rebuild one state at display size. 'scaled_base' was resampled from base pyramid
+    level 'level' (of size 'level_size'); patches are [(box, inner, levels)].
+    """
+    if not patches:
+        return scaled_base
+    img = scaled_base.copy()
+    sx = img.width / level_size[0]
+    sy = img.height / level_size[1]
+    f = 2 ** level
+    for box, inner, levels in patches:
+        patch = levels[min(level, len(levels) - 1)]
+        # Level coordinates - exact, boxes are aligned to 2^level
+        px0, py0 = box[0] / f, box[1] / f
+        ix0, iy0 = inner[0] / f, inner[1] / f
+        ix1, iy1 = min(inner[2] / f, level_size[0]), min(inner[3] / f, level_size[1])
+        # Whole display pixels inside the changed area
+        tx0, ty0 = math.ceil(ix0 * sx), math.ceil(iy0 * sy)
+        tx1, ty1 = min(img.width, math.floor(ix1 * sx)), min(img.height, math.floor(iy1 * sy))
+        if tx1 <= tx0 or ty1 <= ty0:
+            continue
+        src = (tx0 / sx - px0, ty0 / sy - py0, tx1 / sx - px0, ty1 / sy - py0)
+        img.paste(patch.resize((tx1 - tx0, ty1 - ty0), Image.Resampling.BILINEAR, box=src), (tx0, ty0))
+    return img
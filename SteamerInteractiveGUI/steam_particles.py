@@ -0,0 +1,221 @@
+import time
+
+import numpy as np
+from PIL import Image
+
+# Animated steam for the hold-to-steam state.
+#
+# All particle state lives in flat NumPy arrays and is advanced in one batched update.
+# Rasterisation deposits every particle onto a coarse density grid (cells measured in
+# layout pixels, so the cost does not grow with display scale) with a single bincount
+# per size class, softens each class with a separable box blur (3 passes ~ Gaussian),
+# and lets Pillow upscale the result. A small controller keeps step + rasterise under a
+# per-frame millisecond budget by shedding particles first, then output resolution (at
+# large scales the display-size upscale and RGBA merge dominate: the mask is smoothed to
+# 1/2 or 1/4 size and pixel-doubled from there), then grid resolution. If even the
+# cheapest setting is over budget, 'exhausted' is set so the caller can fall back to a
+# static sprite; reset() clears it, keeping the cheap setting, for the next plume.
+
+SIZE_BINS = 3 # Number of blur radii particles are grouped into
+CELL = 3.0 # Density grid cell size in layout pixels at full detail
+
+
+def _box_blur(a, r, axis):
+    """Box filter of radius r along one axis (cumsum, edge-clamped)"""
+    n = a.shape[axis]
+    if axis == 0:
+        p = np.empty((n + 2 * r + 1, a.shape[1]), dtype=a.dtype)
+        p[:r + 1] = a[:1]
+        p[r + 1:r + 1 + n] = a
+        p[r + 1 + n:] = a[-1:]
+        c = p.cumsum(axis=0)
+        return (c[2 * r + 1:] - c[:-2 * r - 1]) * (1.0 / (2 * r + 1))
+    p = np.empty((a.shape[0], n + 2 * r + 1), dtype=a.dtype)
+    p[:, :r + 1] = a[:, :1]
+    p[:, r + 1:r + 1 + n] = a
+    p[:, r + 1 + n:] = a[:, -1:]
+    c = p.cumsum(axis=1)
+    return (c[:, 2 * r + 1:] - c[:, :-2 * r - 1]) * (1.0 / (2 * r + 1))
+
+
+def _soft_blur(a, r):
+    """Three box passes per axis - a cheap Gaussian approximation"""
+    if r < 1:
+        return a
+    for axis in (0, 1):
+        for _ in range(3):
+            a = _box_blur(a, r, axis)
+    return a
+
+
+class SteamParticles:
+    def __init__(self, capacity=600, budget_ms=6.0, seed=None):
+        self.capacity = capacity
+        self.budget_ms = budget_ms
+        self.rng = np.random.default_rng(seed)
+
+        # Particle state (layout pixels, relative to the emitter)
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.float32)
+        self.life = np.ones(capacity, dtype=np.float32)
+        self.phase = np.zeros(capacity, dtype=np.float32) # Per-particle turbulence offset
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.emit_carry = 0.0
+
+        # Emitter (see set_emitter)
+        self.direction = np.array([0.0, -1.0], dtype=np.float32)
+        self.spread = 1.2 # Radians either side of direction
+
+        # Level of detail
+        self.max_particles = capacity
+        self.min_particles = 60
+        self.downsample = 1 # Grid cell = CELL * downsample layout pixels
+        self.max_downsample = 4
+        self.output_div = 1 # Mask smoothed at 1/output_div of display size, then pixel-doubled
+        self.max_output_div = 4
+        self.exhausted = False
+        self.frame_ms = 0.0 # Cost of the current frame (step + render)
+        self.avg_ms = 0.0
+        self.calm_frames = 0
+
+    def set_emitter(self, direction, spread):
+        d = np.asarray(direction, dtype=np.float32)
+        self.direction = d / max(1e-6, float(np.hypot(*d)))
+        self.spread = spread
+
+    def reset(self):
+        self.alive[:] = False
+        self.emit_carry = 0.0
+        # Retry animation at the current level of detail; calm frames restore the rest
+        self.exhausted = False
+        self.frame_ms = 0.0
+        self.avg_ms = 0.0
+        self.calm_frames = 0
+
+    @property
+    def count(self):
+        return int(self.alive.sum())
+
+    def step(self, dt, boost=False, emitting=True):
+        """Advance all particles by dt seconds and emit new ones"""
+        t0 = time.perf_counter()
+        dt = min(dt, 0.1) # Don't explode after a stall
+
+        # 1. Emit
+        if emitting:
+            rate = 200.0 if boost else 120.0
+            self.emit_carry += rate * dt
+            n_new = int(self.emit_carry)
+            self.emit_carry -= n_new
+            n_new = min(n_new, self.max_particles - self.count)
+            if n_new > 0:
+                idx = np.flatnonzero(~self.alive)[:n_new]
+                k = len(idx)
+                speed = (1.4 if boost else 1.0) * self.rng.uniform(60.0, 140.0, k)
+                theta = np.arctan2(self.direction[1], self.direction[0]) + self.rng.uniform(-self.spread, self.spread, k)
+                self.pos[idx] = self.rng.normal(0.0, 4.0, (k, 2))
+                self.vel[idx, 0] = np.cos(theta) * speed
+                self.vel[idx, 1] = np.sin(theta) * speed
+                self.age[idx] = 0.0
+                self.life[idx] = self.rng.uniform(1.2, 2.0, k)
+                self.phase[idx] = self.rng.uniform(0.0, 2 * np.pi, k)
+                self.alive[idx] = True
+
+        # 2. Integrate (all particles at once - dead ones are simply ignored)
+        a = self.alive
+        wobble = np.sin(self.age[a] * 3.0 + self.phase[a]) * 25.0
+        self.vel[a, 0] += wobble * dt
+        self.vel[a, 1] -= 40.0 * dt # Buoyancy
+        self.vel[a] *= (1.0 - 1.2 * dt) # Drag
+        self.pos[a] += self.vel[a] * dt
+        self.age[a] += dt
+        self.alive &= self.age < self.life
+
+        self.frame_ms += (time.perf_counter() - t0) * 1000.0
+
+    def render(self, scale, boost=False):
+        """
+        Rasterise the plume at display scale.
+        Returns (RGBA image, (dx, dy) offset of its top-left from the emitter) or None.
+        """
+        t0 = time.perf_counter()
+        a = self.alive
+        if not a.any():
+            self._account(t0)
+            return None
+
+        pos = self.pos[a]
+        t = self.age[a] / self.life[a]
+        size_mul = 1.3 if boost else 1.0
+        radius = (12.0 + 48.0 * t) * size_mul # Puffs grow as they rise
+        opacity = np.sin(np.pi * t) # Fade in, fade out
+
+        cell = CELL * self.downsample
+        margin = float(radius.max()) * 1.5
+        x0 = float(pos[:, 0].min()) - margin
+        y0 = float(pos[:, 1].min()) - margin
+        gw = int((float(pos[:, 0].max()) + margin - x0) / cell) + 1
+        gh = int((float(pos[:, 1].max()) + margin - y0) / cell) + 1
+
+        gx = np.clip(((pos[:, 0] - x0) / cell).astype(np.int32), 0, gw - 1)
+        gy = np.clip(((pos[:, 1] - y0) / cell).astype(np.int32), 0, gh - 1)
+        flat = gy * gw + gx
+
+        # Group by size; each class is one bincount. Blurs compose (variances add), so
+        # classes are added largest first and the grid is blurred by the difference
+        # between consecutive radii - one cheap blur per class on a single grid.
+        r_min, r_max = float(radius.min()), float(radius.max())
+        edges = np.linspace(r_min, r_max + 1e-3, SIZE_BINS + 1)
+        bins = np.digitize(radius, edges) - 1
+        density = np.zeros((gh, gw), dtype=np.float32)
+        for b in range(SIZE_BINS - 1, -1, -1):
+            r_here = 0.5 * (edges[b] + edges[b + 1]) / cell / 1.7
+            r_next = 0.5 * (edges[b - 1] + edges[b]) / cell / 1.7 if b > 0 else 0.0
+            sel = bins == b
+            if sel.any():
+                # Weight keeps the blurred peak roughly independent of blur radius
+                w = opacity[sel] * (2 * r_here + 1) ** 2 * 0.35
+                density += np.bincount(flat[sel], weights=w, minlength=gw * gh).reshape(gh, gw)
+            density = _soft_blur(density, int(round(np.sqrt(max(0.0, r_here ** 2 - r_next ** 2)))))
+
+        alpha = (255.0 * (1.0 - np.exp(-density))).astype(np.uint8)
+        mask = Image.fromarray(alpha, "L")
+        size = (max(1, int(gw * cell * scale)), max(1, int(gh * cell * scale)))
+        if self.output_div > 1:
+            smooth = (max(1, size[0] // self.output_div), max(1, size[1] // self.output_div))
+            mask = mask.resize(smooth, Image.Resampling.BILINEAR).resize(size, Image.Resampling.NEAREST)
+        else:
+            mask = mask.resize(size, Image.Resampling.BILINEAR)
+        layer = Image.merge("RGBA", (mask, mask, mask, mask)) # White, screen-blended
+
+        self._account(t0)
+        return layer, (int(x0 * scale), int(y0 * scale))
+
+    def _account(self, t0):
+        """Close the frame and adjust level of detail against the budget"""
+        self.frame_ms += (time.perf_counter() - t0) * 1000.0
+        self.avg_ms = 0.8 * self.avg_ms + 0.2 * self.frame_ms
+        self.frame_ms = 0.0
+
+        if self.avg_ms > self.budget_ms:
+            self.calm_frames = 0
+            if self.max_particles > self.min_particles:
+                self.max_particles = max(self.min_particles, int(self.max_particles * 0.75))
+            elif self.output_div < self.max_output_div:
+                self.output_div *= 2
+            elif self.downsample < self.max_downsample:
+                self.downsample *= 2
+            else:
+                self.exhausted = True
+            self.avg_ms = self.budget_ms * 0.9 # Give the new setting a chance
+        elif self.avg_ms < self.budget_ms * 0.5:
+            self.calm_frames += 1
+            if self.calm_frames >= 30:
+                self.calm_frames = 0
+                if self.downsample > 1:
+                    self.downsample //= 2
+                elif self.output_div > 1:
+                    self.output_div //= 2
+                elif self.max_particles < self.capacity:
+                    self.max_particles = min(self.capacity, int(self.max_particles * 1.25) + 1)
@@ -0,0 +1,90 @@
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+from integrated_gui import SteamerGUI
+
+# Frame upload benchmark (needs a display).
+#
+# Opens the simulator, waits for the first frame, then runs one 8 s power-on heat-up
+# and reports the Tk upload cost of its frames (display_current_image: pixels copied
+# into the canvas photo per frame, and the time spent doing it). --full times the old
+# whole-frame upload (STEAMER_FULL_UPLOAD) for comparison.
+#
+# Afterwards the canvas photo is sampled inside every region the heat-up touched and
+# compared with the last composited frame, so an upload that leaves stale pixels
+# behind (e.g. blending instead of replacing) shows up as a non-zero difference.
+#
+#   python upload_bench.py --view line
+#   python upload_bench.py --view line --full
+
+SETTLE_MS = 2000 # Startup and first frame
+HEAT_UP_MS = 8500
+SETTLED_MS = 1000 # After the heat-up, before sampling the photo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time frame uploads to Tk during a heat-up")
+    parser.add_argument("--view", choices=("line", "render"), default="line")
+    parser.add_argument("--full", action="store_true", help="Upload whole frames (STEAMER_FULL_UPLOAD)")
+    args = parser.parse_args()
+
+    if args.full:
+        os.environ["STEAMER_FULL_UPLOAD"] = "1"
+    root = tk.Tk()
+    app = SteamerGUI(root)
+    touched = set()
+    result = {}
+
+    def start():
+        if app.use_renders != (args.view == "render"):
+            app.toggle_view_mode()
+        root.update()
+        app.upload_stats.update(frames=0, pixels=0, seconds=0.0)
+        app.toggle_power()
+        track()
+
+    def track():
+        touched.update(app.current_dirty_rects)
+        if app.is_heating:
+            root.after(20, track)
+
+    def heated():
+        result.update(app.upload_stats)
+        root.after(SETTLED_MS, finish)
+
+    def finish():
+        frame = app.current_processed_image.convert("RGBA")
+        worst = 0
+        for x1, y1, x2, y2 in touched:
+            for x in range(x1, x2, max(1, (x2 - x1) // 8)):
+                for y in range(y1, y2, max(1, (y2 - y1) // 8)):
+                    shown = root.tk.call(str(app.tk_image), "get", x, y)
+                    want = frame.getpixel((x, y))[:3]
+                    worst = max(worst, max(abs(int(a) - b) for a, b in zip(shown, want)))
+        result["worst"] = worst
+        result["size"] = frame.size
+        root.destroy()
+
+    root.after(SETTLE_MS, start)
+    root.after(SETTLE_MS + HEAT_UP_MS, heated)
+    t0 = time.perf_counter()
+    root.mainloop()
+    if "frames" not in result or not result["frames"]:
+        print("No frames uploaded")
+        return 1
+
+    n = result["frames"]
+    mode = "full" if args.full else "incremental"
+    print(f"{args.view} view, {mode} upload, frame {result['size'][0]}x{result['size'][1]} "
+          f"({time.perf_counter() - t0:.0f}s run)")
+    print(f"  {n} frames: {result['seconds'] * 1000 / n:.2f} ms upload/frame, "
+          f"{result['pixels'] // n} px/frame")
+    print(f"  Photo vs frame in touched regions: max channel difference {result['worst']}")
+    return 0 if result["worst"] <= 1 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
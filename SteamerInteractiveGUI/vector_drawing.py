@@ -0,0 +1,261 @@
+import os
+import re
+import zlib
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from asset_store import source_stamp
+
+# The line view drawn straight from the vector drawing (SteamerPDF.PDF).
+#
+# The PDF's stroked paths are extracted once into a small cache (vector_paths.npz next
+# to the app, rebuilt when the PDF changes): polyline points in crop-box points (y
+# down), plus each polyline's stroke width and brightness. Every scale is then
+# rasterised directly at display size - white lines on black like load_line_drawing() -
+# so lines stay crisp at any size and no full-resolution raster is held in memory.
+#
+# Only what a CAD export of a line drawing uses is read: q/Q/cm, w, grey/RGB stroke
+# colour, m/l/c/v/y/h/re path construction and stroking. Fills, text and images are
+# skipped; in this drawing they are the title block, outside the crop box.
+#
+# Anti-aliasing: polylines are drawn 2-4x larger (less for wide outputs, whose strokes
+# are several pixels thick) in horizontal bands of at most BAND_PIXELS, each
+# box-reduced into the output, so the scratch memory stays small at any display size.
+# Strokes are STROKE_WEIGHT times the PDF width to match the line weight of the
+# shipped raster export.
+#
+#   STEAMER_VECTOR_LINES=1   use the vector source for the line view
+
+PDF_FILE = "SteamerPDF.PDF"
+CACHE_FILE = "vector_paths.npz"
+SUPERSAMPLE = 4
+MAX_SUPERSAMPLED_WIDTH = 8000
+STROKE_WEIGHT = 1.35
+BAND_PIXELS = 4_000_000
+BEZIER_STEPS = 8 # Line segments per curve
+
+# Pixel values of the inverted steamer.png: lines ~231 grey, background alpha 24
+LINE_LEVEL = 231
+BACKGROUND_ALPHA = 24
+
+_TOKEN = re.compile(
+    rb"%[^\r\n]*"                           # Comment
+    rb"|\((?:\\.|[^\\)])*\)"                # Literal string (unnested)
+    rb"|<[0-9A-Fa-f\s]*>"                   # Hex string
+    rb"|<<|>>|\[|\]"
+    rb"|/[^\s/\[\]()<>{}%]*"                # Name
+    rb"|[-+]?(?:\d+\.?\d*|\.\d+)"           # Number
+    rb"|[A-Za-z'\"*][A-Za-z0-9'\"*]*"       # Operator
+)
+
+
+def vector_lines_enabled():
+    return os.environ.get("STEAMER_VECTOR_LINES", "") not in ("", "0")
+
+
+def _objects(data):
+    """{object number: body} of the top-level objects in a PDF"""
+    return {int(m.group(1)): m.group(2) for m in re.finditer(rb"(\d+)\s+\d+\s+obj(.*?)endobj", data, re.S)}
+
+
+def _stream(body):
+    """Decoded stream data of an object body"""
+    start = body.index(b"stream") + len(b"stream")
+    if body[start:start + 2] == b"\r\n":
+        start += 2
+    elif body[start:start + 1] in (b"\r", b"\n"):
+        start += 1
+    raw = body[start:body.rindex(b"endstream")]
+    if b"/FlateDecode" in body[:body.index(b"stream")]:
+        return zlib.decompressobj().decompress(raw)
+    return raw
+
+
+def _page(objects):
+    """(crop box, concatenated content stream) of the first page"""
+    for body in objects.values():
+        if re.search(rb"/Type\s*/Page(?![a-z])", body):
+            break
+    else:
+        raise ValueError("No page in PDF")
+    box = re.search(rb"/CropBox\s*\[([^\]]*)\]", body) or re.search(rb"/MediaBox\s*\[([^\]]*)\]", body)
+    crop = [float(v) for v in box.group(1).split()]
+    refs = re.search(rb"/Contents\s*(\[[^\]]*\]|\d+\s+\d+\s+R)", body).group(1)
+    content = b"\n".join(_stream(objects[int(n)]) for n in re.findall(rb"(\d+)\s+\d+\s+R", refs))
+    return crop, content
+
+
+def _bezier(p0, p1, p2, p3):
+    t = np.linspace(0, 1, BEZIER_STEPS + 1)[1:, None]
+    mt = 1 - t
+    pts = mt ** 3 * p0 + 3 * mt ** 2 * t * p1 + 3 * mt * t ** 2 * p2 + t ** 3 * p3
+    return [tuple(p) for p in pts]
+
+
+def extract_paths(pdf_path):
+    """
+    Stroked polylines of a PDF page -> (size, points, offsets, widths, levels):
+    crop-box size in points, (N, 2) float32 points relative to the crop box (y down),
+    polyline i = points[offsets[i]:offsets[i+1]], stroke widths in points and line
+    brightness 0-255 (inverted stroke colour).
+    """
+    with open(pdf_path, "rb") as f:
+        crop, content = _page(_objects(f.read()))
+    x0, y0, x1, y1 = crop
+
+    ctm = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    width, gray = 1.0, 0.0
+    stack = []
+    operands = []
+    subpaths = [] # Current path, in page space
+    polylines = [] # (points, width, level)
+
+    def page_point(x, y):
+        a, b, c, d, e, f = ctm
+        return (a * x + c * y + e, b * x + d * y + f)
+
+    for m in _TOKEN.finditer(content):
+        tok = m.group()
+        first = tok[:1]
+        if first in b"%(<[]/" or tok == b">>":
+            if first != b"%":
+                operands.append(tok)
+            continue
+        if first.isdigit() or first in b"-+.":
+            operands.append(float(tok))
+            continue
+        op = tok
+        nums = [v for v in operands if isinstance(v, float)]
+        operands = []
+        if op == b"q":
+            stack.append((ctm, width, gray))
+        elif op == b"Q" and stack:
+            ctm, width, gray = stack.pop()
+        elif op == b"cm" and len(nums) == 6:
+            a, b, c, d, e, f = nums
+            A, B, C, D, E, F = ctm
+            ctm = (a * A + b * C, a * B + b * D, c * A + d * C, c * B + d * D, e * A + f * C + E, e * B + f * D + F)
+        elif op == b"w" and nums:
+            width = nums[0]
+        elif op == b"G" and nums:
+            gray = nums[0]
+        elif op == b"RG" and len(nums) == 3:
+            gray = 0.299 * nums[0] + 0.587 * nums[1] + 0.114 * nums[2]
+        elif op == b"K" and len(nums) == 4:
+            gray = 1.0 - min(1.0, 0.3 * nums[0] + 0.59 * nums[1] + 0.11 * nums[2] + nums[3])
+        elif op == b"m" and len(nums) == 2:
+            subpaths.append([page_point(*nums)])
+        elif op == b"l" and len(nums) == 2 and subpaths:
+            subpaths[-1].append(page_point(*nums))
+        elif op in (b"c", b"v", b"y") and subpaths:
+            p0 = np.array(subpaths[-1][-1])
+            pts = [np.array(page_point(nums[i], nums[i + 1])) for i in range(0, len(nums), 2)]
+            if op == b"v":
+                pts = [p0] + pts
+            elif op == b"y":
+                pts = pts + [pts[-1]]
+            if len(pts) == 3:
+                subpaths[-1].extend(_bezier(p0, *pts))
+        elif op == b"h" and subpaths:
+            subpaths[-1].append(subpaths[-1][0])
+        elif op == b"re" and len(nums) == 4:
+            x, y, w, h = nums
+            subpaths.append([page_point(x, y), page_point(x + w, y), page_point(x + w, y + h),
+                             page_point(x, y + h), page_point(x, y)])
+        elif op in (b"S", b"s", b"B", b"B*", b"b", b"b*", b"f", b"F", b"f*", b"n"):
+            if op in (b"s", b"b", b"b*"):
+                for sp in subpaths:
+                    sp.append(sp[0])
+            if op not in (b"f", b"F", b"f*", b"n"):
+                a, b, c, d = ctm[:4]
+                page_width = width * abs(a * d - b * c) ** 0.5
+                level = round(255 * (1.0 - gray))
+                polylines.extend((sp, page_width, level) for sp in subpaths if len(sp) > 1)
+            subpaths = []
+
+    size = (x1 - x0, y1 - y0)
+    points, offsets, widths, levels = [], [0], [], []
+    for sp, w, level in polylines:
+        pts = np.array(sp, dtype=np.float64)
+        pts[:, 0] -= x0
+        pts[:, 1] = y1 - pts[:, 1]
+        lo, hi = pts.min(axis=0) - w, pts.max(axis=0) + w
+        if hi[0] < 0 or hi[1] < 0 or lo[0] > size[0] or lo[1] > size[1]:
+            continue # Outside the crop box
+        points.append(pts)
+        offsets.append(offsets[-1] + len(pts))
+        widths.append(w)
+        levels.append(level)
+    if not points:
+        raise ValueError("No stroked paths inside the crop box")
+    return (size, np.concatenate(points).astype(np.float32), np.array(offsets, dtype=np.int32),
+            np.array(widths, dtype=np.float32), np.array(levels, dtype=np.uint8))
+
+
+class VectorDrawing:
+    """Extracted polylines of the line drawing, rasterised on demand"""
+
+    def __init__(self, size, points, offsets, widths, levels):
+        self.size = tuple(float(v) for v in size) # Crop box in points
+        self.points = points
+        self.offsets = offsets
+        self.widths = widths
+        self.levels = levels
+
+    @classmethod
+    def load(cls, pdf_path, cache_path):
+        """From the cache if it matches the PDF, else extract (and try to write the cache)"""
+        stamp = np.array(source_stamp(pdf_path), dtype=np.int64)
+        try:
+            with np.load(cache_path) as data:
+                if np.array_equal(data["stamp"], stamp):
+                    return cls(data["size"], data["points"], data["offsets"], data["widths"], data["levels"])
+        except (OSError, KeyError, ValueError):
+            pass
+        drawing = cls(*extract_paths(pdf_path))
+        try:
+            tmp_path = cache_path + ".tmp.npz"
+            np.savez(tmp_path, stamp=stamp, size=np.array(drawing.size), points=drawing.points,
+                     offsets=drawing.offsets, widths=drawing.widths, levels=drawing.levels)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write vector cache {cache_path}: {e}")
+        return drawing
+
+    def nbytes(self):
+        return self.points.nbytes + self.offsets.nbytes + self.widths.nbytes + self.levels.nbytes
+
+    def rasterise(self, size):
+        """The drawing inverted (white lines, black background) as an RGBA image of 'size'"""
+        w, h = size
+        ss = max(2, min(SUPERSAMPLE, MAX_SUPERSAMPLED_WIDTH // w))
+        kx, ky = w / self.size[0] * ss, h / self.size[1] * ss
+        pts = self.points * np.array([kx, ky], dtype=np.float32)
+        line_widths = np.maximum(1, np.rint(self.widths * STROKE_WEIGHT * kx)).astype(int)
+        starts, ends = self.offsets[:-1], self.offsets[1:]
+        # Vertical extent of each polyline (with its stroke) for band culling
+        top = np.minimum.reduceat(pts[:, 1], starts) - line_widths
+        bottom = np.maximum.reduceat(pts[:, 1], starts) + line_widths
+
+        coverage = Image.new("L", size)
+        band_h = max(1, BAND_PIXELS // (w * ss * ss))
+        for y in range(0, h, band_h):
+            bh = min(band_h, h - y)
+            oy = y * ss
+            band = Image.new("L", (w * ss, bh * ss))
+            draw = ImageDraw.Draw(band)
+            for i in np.nonzero((bottom >= oy) & (top <= oy + bh * ss))[0]:
+                poly = pts[starts[i]:ends[i]] - (0, oy)
+                lw, level = int(line_widths[i]), int(self.levels[i])
+                draw.line(poly.ravel().tolist(), fill=level, width=lw, joint="curve")
+                if lw > 2:
+                    # Round caps
+                    r = lw / 2
+                    for px, py in (poly[0], poly[-1]):
+                        draw.ellipse((px - r, py - r, px + r, py + r), fill=level)
+            coverage.paste(band.reduce(ss), (0, y))
+
+        rgb = coverage.point(lambda v: v * LINE_LEVEL // 255)
+        alpha = coverage.point(lambda v: BACKGROUND_ALPHA + v * (255 - BACKGROUND_ALPHA) // 255)
+        return Image.merge("RGBA", (rgb, rgb, rgb, alpha))